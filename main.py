@@ -92,19 +92,28 @@ class PivotTradingSystem:
             sys.exit(1)
     
     def load_control_state(self):
-        """Load trading control state from file"""
-        try:
-            with open(self.control_file, 'r') as f:
-                self.control = json.load(f)
-        except:
+        """Load trading control state from file (defaults if missing or unreadable)"""
+        control = None
+        if os.path.exists(self.control_file):
+            try:
+                with open(self.control_file, 'r') as f:
+                    control = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Unreadable control file {self.control_file}, resetting: {e}")
+        
+        if control is not None:
+            self.control = control
+        else:
             self.control = {
                 'trading_enabled': True,
                 'panic_mode': False,
                 'last_updated': None
             }
             os.makedirs('data', exist_ok=True)
-            with open(self.control_file, 'w') as f:
+            tmp_path = f"{self.control_file}.tmp"
+            with open(tmp_path, 'w') as f:
                 json.dump(self.control, f, indent=2)
+            os.replace(tmp_path, self.control_file)
         
         logger.info(f"Control state: trading_enabled={self.control['trading_enabled']}, panic_mode={self.control['panic_mode']}")
     
@@ -195,7 +204,8 @@ class PivotTradingSystem:
                 kite_test = KiteClient(
                     self.config['api_key'],
                     self.config['api_secret'],
-                    access_token
+                    access_token,
+                    cache_dir=self.config['data'].get('cache_dir', 'data/cache')
                 )
                 
                 is_valid, result = kite_test.validate_token()
@@ -209,6 +219,8 @@ class PivotTradingSystem:
                     
                     # Initialize Kite components
                     self.kite = kite_test
+                    if self.data_manager:
+                        self.data_manager.close()  # Yesterday's instance
                     self.data_manager = DataManager(self.kite, self.config)
                     self.pivot_calc = PivotCalculator(self.config)
                     self.signal_gen = SignalGenerator(self.config, self.pivot_calc)
@@ -300,14 +312,24 @@ class PivotTradingSystem:
             days_to_expiry = self.data_manager.days_to_expiry()
             logger.info(f"Days to expiry: {days_to_expiry}")
             
-            # 5. For each strike, calculate pivots
+            # 5. Fetch previous day OHLC for all strikes in one batch
+            symbols = {
+                (strike, option_type): self.data_manager.get_option_symbol(strike, option_type)
+                for strike in strikes
+                for option_type in ['CE', 'PE']
+            }
+            ohlc_data = self.data_manager.fetch_previous_day_ohlc_batch(
+                list(symbols.values())
+            )
+            
+            # 6. For each strike, calculate pivots
             for strike in strikes:
                 self.pivot_data[strike] = {'CE': None, 'PE': None}
                 self.market_structure[strike] = {'CE': None, 'PE': None}
                 
                 for option_type in ['CE', 'PE']:
-                    symbol = self.data_manager.get_option_symbol(strike, option_type)
-                    ohlc = self.data_manager.fetch_previous_day_ohlc(symbol)
+                    symbol = symbols[(strike, option_type)]
+                    ohlc = ohlc_data[symbol]
                     
                     if not ohlc:
                         logger.warning(f"No OHLC data for {symbol}")
@@ -445,6 +467,9 @@ Monitoring for entry signals...
             else:
                 logger.info("📊 No trades executed today.")
             
+            # Refresh planner stats and truncate the WAL while the market is shut
+            self.database.maintain()
+            
             # Data cleanup
             if self.data_manager:
                 self.data_manager.cleanup_cache()
@@ -605,6 +630,11 @@ Monitoring for entry signals...
             logger.error(f"Fatal error: {e}", exc_info=True)
             self.notifier.send_message(f"❌ Fatal Error: {str(e)}")
             raise
+        finally:
+            if self.data_manager:
+                self.data_manager.close()
+            self.notifier.close()
+            self.database.close()
 
 
 def main():
@@ -30,6 +30,11 @@ class AuthManager:
             self.server_url = parts[0] if len(parts) > 1 else self.postback_url
         else:
             self.server_url = None
+        
+        # Static endpoints (built once, reused on every auth attempt)
+        self.login_url = f"https://kite.zerodha.com/connect/login?api_key={self.api_key}&v=3"
+        self.health_url = "http://localhost:8001/health"
+        self.token_url = "http://localhost:8001/get_token"
     
     def is_token_acceptable(self):
         """
@@ -145,10 +150,8 @@ class AuthManager:
             return False, str(e)
     
     def generate_login_url(self):
-        """Generate Kite OAuth login URL"""
-        login_url = f"https://kite.zerodha.com/connect/login?api_key={self.api_key}&v=3"
-        logger.info("Generated OAuth URL")
-        return login_url
+        """Return Kite OAuth login URL (precomputed in __init__)"""
+        return self.login_url
     
     def check_postback_server(self):
         """Check if auth server is running"""
@@ -157,8 +160,7 @@ class AuthManager:
             return False
         
         try:
-            health_url = "http://localhost:8001/health"
-            response = requests.get(health_url, timeout=5)
+            response = requests.get(self.health_url, timeout=5)
             
             if response.status_code == 200:
                 logger.info("✅ Auth server reachable")
@@ -180,7 +182,6 @@ class AuthManager:
             logger.error("No server URL configured")
             return None
         
-        token_url = "http://localhost:8001/get_token"
         start_time = time.time()
         
         logger.info(f"⏳ Waiting for request token (timeout: {timeout}s)...")
@@ -190,7 +191,7 @@ class AuthManager:
             check_count += 1
             
             try:
-                response = requests.get(token_url, timeout=5)
+                response = requests.get(self.token_url, timeout=5)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -3,9 +3,266 @@ Data Manager Module
 Handles data fetching, caching, and processing
 """
 
+import os
+import sys
+import threading
+import pickle
+import hashlib
+import logging
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
-from collections import deque
+from datetime import datetime, date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, cached_property
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_candles(raw):
+    """
+    Convert Kite historical rows to (open, high, low, close, volume,
+    timestamp) tuples, oldest first. Volume is optional and defaults to 0.
+    """
+    return [
+        (r['open'], r['high'], r['low'], r['close'], r.get('volume', 0), r['date'])
+        for r in raw
+    ]
+
+
+# Trading calendar: one flag byte per day, indexed by (date ordinal - epoch).
+# Weekday falls out as (ordinal - 1) % 7 since ordinal 1 (0001-01-01) is a
+# Monday. The day walks below become a scan over this table.
+_NON_TRADING = 1  # Weekend or holiday
+_HOLIDAY = 2      # Exchange holiday
+_CALENDAR_SPAN = 512  # Days either side of the centre date
+_CALENDAR_MARGIN = 31  # Rebuild when a lookup gets this close to an edge
+
+
+def _build_calendar(holiday_ords, center_ord):
+    """Return (epoch_ordinal, flag table) covering center_ord +/- span"""
+    epoch = center_ord - _CALENDAR_SPAN
+    table = bytearray(2 * _CALENDAR_SPAN)
+    for i in range(len(table)):
+        o = epoch + i
+        if (o - 1) % 7 >= 5:
+            table[i] |= _NON_TRADING
+        if o in holiday_ords:
+            table[i] |= _NON_TRADING | _HOLIDAY
+    # bytes (not bytearray) so it can key the lru caches; its hash is cached
+    return epoch, bytes(table)
+
+
+@lru_cache(maxsize=512)
+def _prev_trading_day(day, epoch, table):
+    """Walk back from day to the previous trading day in the calendar"""
+    i = day.toordinal() - 1 - epoch
+    
+    # Skip weekends and holidays
+    while table[i] & _NON_TRADING:
+        i -= 1
+    
+    return date.fromordinal(epoch + i)
+
+
+@lru_cache(maxsize=512)
+def _next_expiry(from_date, expiry_weekday, epoch, table):
+    """Next expiry_weekday after from_date, moved back over holidays"""
+    days_ahead = expiry_weekday - from_date.weekday()
+    if days_ahead <= 0:  # Target day already happened this week
+        days_ahead += 7
+    
+    i = from_date.toordinal() + days_ahead - epoch
+    
+    # If it's a holiday, move to previous day
+    while table[i] & _HOLIDAY:
+        i -= 1
+    
+    return date.fromordinal(epoch + i)
+
+
+@lru_cache(maxsize=2048)
+def _build_symbol(instrument, expiry_date, strike, option_type):
+    """Format option symbol, e.g. SENSEX25OCT84300CE"""
+    # Format: YY (25), MONTH (OCT), STRIKE (84300)
+    year = expiry_date.strftime('%y')  # 25
+    month = expiry_date.strftime('%b').upper()  # OCT
+    strike_str = str(int(strike))  # 84300
+    
+    # Interned so it shares the key object in KiteClient's instrument index
+    return sys.intern(f"{instrument}{year}{month}{strike_str}{option_type}")
+
+
+class CandleBuffer:
+    """
+    Fixed-size ring buffer of candles in columnar (SoA) layout
+    
+    OHLCV values live in preallocated float64 arrays of shape
+    (capacity, 5) so percentile/rolling maths can run on whole columns.
+    Timestamps are kept in parallel object arrays (Kite returns
+    tz-aware datetimes, which datetime64 would strip).
+    
+    The arrays are double-buffered (ping-pong): the producer writes into
+    the back buffer and then publishes it by swapping (front, count) in a
+    single assignment. The write that just went to one buffer is replayed
+    into the other on the next write, keeping each write O(1).
+    
+    A reader on another thread sees consistent rows as long as at most
+    one write lands while it reads: the second write goes back into the
+    buffer the reader captured. The candle writers run once per interval,
+    so reads don't overlap two writes in practice; anything that could
+    must serialize with the writer instead.
+    """
+    
+    OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+    
+    def __init__(self, capacity=50):
+        self.capacity = capacity
+        self._values = (np.zeros((capacity, 5)), np.zeros((capacity, 5)))
+        self._timestamps = (
+            np.empty(capacity, dtype=object),
+            np.empty(capacity, dtype=object)
+        )
+        self._state = (0, 0)  # (front buffer index, total candles written)
+        self._pending = None  # Last (slot, row) not yet in the back buffer
+    
+    @property
+    def count(self):
+        """Total candles ever written"""
+        return self._state[1]
+    
+    @property
+    def values(self):
+        """Published (front) OHLCV array"""
+        return self._values[self._state[0]]
+    
+    def __len__(self):
+        return min(self._state[1], self.capacity)
+    
+    def _write(self, slot, row, advance):
+        """Write row into the back buffer at slot, then swap it to the front"""
+        front, count = self._state
+        back = 1 - front
+        
+        if self._pending is not None:
+            pending_slot, pending_row = self._pending
+            self._values[back][pending_slot] = pending_row[:5]
+            self._timestamps[back][pending_slot] = pending_row[5]
+        
+        self._values[back][slot] = row[:5]
+        self._timestamps[back][slot] = row[5]
+        
+        self._state = (back, count + 1 if advance else count)
+        self._pending = (slot, row)
+    
+    def append(self, candle):
+        """Write candle dict into the next ring slot"""
+        self._write(self.count % self.capacity, (
+            candle['open'], candle['high'], candle['low'], candle['close'],
+            candle.get('volume', 0), candle['timestamp']
+        ), advance=True)
+    
+    def extend_rows(self, rows):
+        """Append (open, high, low, close, volume, timestamp) tuples"""
+        for row in rows[-self.capacity:]:
+            self._write(self.count % self.capacity, row, advance=True)
+    
+    def merge_rows(self, rows):
+        """
+        Merge a delta fetch into the buffer
+        
+        A row matching the newest timestamp refreshes that candle in place
+        (it may have still been forming when first fetched); newer rows are
+        appended and older ones ignored.
+        """
+        last_ts = self.last_timestamp()
+        new_rows = []
+        for row in rows:
+            if last_ts is not None and row[5] == last_ts:
+                self._write((self.count - 1) % self.capacity, row, advance=False)
+            elif last_ts is None or row[5] > last_ts:
+                new_rows.append(row)
+        self.extend_rows(new_rows)
+    
+    def last_timestamp(self):
+        """Timestamp of newest candle, or None if empty"""
+        front, count = self._state
+        if not count:
+            return None
+        return self._timestamps[front][(count - 1) % self.capacity]
+    
+    def _snapshot(self, count=None):
+        """Front buffer and ring indices of the last count candles"""
+        front, total = self._state
+        n = min(total, self.capacity)
+        if count is not None:
+            n = min(count, n)
+        return front, np.arange(total - n, total) % self.capacity
+    
+    def array(self, count=None):
+        """Return last count candles as an (n, 5) OHLCV array, oldest first"""
+        front, idx = self._snapshot(count)
+        return self._values[front][idx]
+    
+    def to_candles(self, count=None):
+        """Return last count candles as a list of dicts, oldest first"""
+        front, idx = self._snapshot(count)
+        # A literal with constant keys builds from one interned key tuple;
+        # it beats dict(zip(keys, row)) and keeps the dict contract callers use
+        return [
+            {
+                'open': o,
+                'high': h,
+                'low': l,
+                'close': c,
+                'volume': v,
+                'timestamp': ts
+            }
+            for (o, h, l, c, v), ts in zip(
+                self._values[front][idx].tolist(), self._timestamps[front][idx]
+            )
+        ]
+
+
+class DiskCandleCache:
+    """
+    File-backed candle cache so intraday restarts don't re-fetch candles
+    
+    One pickled CandleBuffer per (symbol, session date). Entries from earlier sessions
+    are never read (the date is part of the key) and are wiped at EOD.
+    """
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def _path(self, symbol, date):
+        key = hashlib.md5(f"{symbol}|{date}|3minute".encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+    
+    def get(self, symbol, date):
+        """Return cached CandleBuffer, or None on miss"""
+        try:
+            with open(self._path(symbol, date), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, EOFError, AttributeError, pickle.UnpicklingError):
+            return None
+    
+    def put(self, symbol, date, buffer):
+        """Write buffer for (symbol, date), replacing any previous entry"""
+        path = self._path(symbol, date)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(buffer, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Error writing candle cache for %s: %s", symbol, e)
+    
+    def clear(self):
+        """Delete all cached candle files"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pkl') or name.endswith('.tmp'):
+                os.remove(os.path.join(self.cache_dir, name))
 
 
 class DataManager:
@@ -14,11 +271,70 @@ class DataManager:
         self.config = config
         
         # In-memory cache for candles
-        self.candle_cache = {}  # {symbol: deque of candles}
+        self.candle_cache = {}  # {symbol: CandleBuffer}
         self.max_cache_size = 50  # Keep last 50 candles
+        self.candle_interval_seconds = 180  # 3-minute candles
+        self._warmed_up = set()  # Symbols with a full window already fetched
+        self._total_candles = 0  # Running sum of len() over candle_cache
+        self._total_lock = threading.Lock()  # Executor threads update it too
+        
+        # On-disk copy of candle_cache (survives restarts within the day)
+        cache_dir = config.get('data', {}).get('cache_dir', 'data/cache')
+        self.disk_cache = DiskCandleCache(cache_dir)
         
         # Cache for option symbols
         self.symbol_cache = {}  # {strike: {CE: symbol, PE: symbol}}
+        
+        # Shared pool for fanning out per-symbol API calls
+        # (3 workers keeps us within Kite's historical-data rate limit)
+        self.executor = ThreadPoolExecutor(max_workers=3)
+        
+        # Expiry resolved for the most recent days_to_expiry() date
+        self._expiry_asof = None
+        self._expiry_for_date = None
+    
+    # Config-derived values: computed on first use, then cached until
+    # reload_config(). Config is treated as immutable in between.
+    _CONFIG_PROPERTIES = ('_instrument', '_expiry_weekday', '_holiday_ords', '_calendar')
+    
+    @cached_property
+    def _instrument(self):
+        return self.config['trading']['instrument']
+    
+    @cached_property
+    def _expiry_weekday(self):
+        """Weekly expiry day of week (0=Mon, 6=Sun)"""
+        if self._instrument == 'SENSEX':
+            return 3  # Thursday
+        elif self._instrument == 'NIFTY':
+            return 1  # Tuesday
+        raise ValueError(f"Unknown instrument: {self._instrument}")
+    
+    @cached_property
+    def _holiday_ords(self):
+        """Holiday date ordinals (frozenset so it can key the lru caches)"""
+        return frozenset(
+            date.fromisoformat(h).toordinal()
+            for h in self.config['market']['holidays']
+        )
+    
+    @cached_property
+    def _calendar(self):
+        """(epoch, flag table) trading calendar centred on today"""
+        return _build_calendar(self._holiday_ords, datetime.now().date().toordinal())
+    
+    def reload_config(self, config):
+        """
+        Swap in a new config and drop everything derived from the old one
+        
+        Call this instead of mutating self.config in place; the cached
+        instrument/holiday values are otherwise not re-read.
+        """
+        self.config = config
+        for name in self._CONFIG_PROPERTIES:
+            self.__dict__.pop(name, None)
+        self._expiry_asof = None
+        self.symbol_cache.clear()
     
     def get_previous_trading_day(self, date=None):
         """
@@ -32,18 +348,7 @@ class DataManager:
         if date is None:
             date = datetime.now().date()
         
-        holidays = [
-            datetime.strptime(h, '%Y-%m-%d').date() 
-            for h in self.config['market']['holidays']
-        ]
-        
-        prev = date - timedelta(days=1)
-        
-        # Skip weekends and holidays
-        while prev.weekday() >= 5 or prev in holidays:
-            prev -= timedelta(days=1)
-        
-        return prev
+        return _prev_trading_day(date, *self._calendar_for(date))
     
     def get_option_symbol(self, strike, option_type, expiry_date=None):
         """
@@ -58,19 +363,10 @@ class DataManager:
         
         Returns: Option symbol string
         """
-        instrument = self.config['trading']['instrument']
-        
         if expiry_date is None:
             expiry_date = self.get_next_expiry()
         
-        # Format: YY (25), MONTH (OCT), STRIKE (84300)
-        year = expiry_date.strftime('%y')  # 25
-        month = expiry_date.strftime('%b').upper()  # OCT
-        strike_str = str(int(strike))  # 84300
-        
-        symbol = f"{instrument}{year}{month}{strike_str}{option_type}"
-        
-        return symbol
+        return _build_symbol(self._instrument, expiry_date, strike, option_type)
     
     def get_next_expiry(self, from_date=None):
         """
@@ -83,41 +379,26 @@ class DataManager:
         if from_date is None:
             from_date = datetime.now().date()
         
-        instrument = self.config['trading']['instrument']
-        
-        # Determine expiry day of week
-        if instrument == 'SENSEX':
-            expiry_weekday = 3  # Thursday (0=Mon, 6=Sun)
-        elif instrument == 'NIFTY':
-            expiry_weekday = 1  # Tuesday
-        else:
-            raise ValueError(f"Unknown instrument: {instrument}")
-        
-        # Find next expiry
-        days_ahead = expiry_weekday - from_date.weekday()
-        if days_ahead <= 0:  # Target day already happened this week
-            days_ahead += 7
-        
-        expiry = from_date + timedelta(days=days_ahead)
-        
-        # Check if it's a holiday, if yes move to previous day
-        holidays = [
-            datetime.strptime(h, '%Y-%m-%d').date() 
-            for h in self.config['market']['holidays']
-        ]
-        
-        while expiry in holidays:
-            expiry -= timedelta(days=1)
-        
-        return expiry
+        return _next_expiry(from_date, self._expiry_weekday, *self._calendar_for(from_date))
+    
+    def _calendar_for(self, day):
+        """Trading calendar covering day, rebuilt around it if needed"""
+        epoch, table = self._calendar
+        o = day.toordinal()
+        if not (epoch + _CALENDAR_MARGIN <= o < epoch + len(table) - _CALENDAR_MARGIN):
+            self._calendar = _build_calendar(self._holiday_ords, o)
+        return self._calendar
     
     def days_to_expiry(self, from_date=None):
         """Calculate days remaining to expiry"""
         if from_date is None:
             from_date = datetime.now().date()
         
-        expiry = self.get_next_expiry(from_date)
-        return (expiry - from_date).days
+        if self._expiry_asof != from_date:
+            self._expiry_for_date = self.get_next_expiry(from_date)
+            self._expiry_asof = from_date
+        
+        return (self._expiry_for_date - from_date).days
     
     def fetch_previous_day_ohlc(self, symbol, date=None):
         """
@@ -147,7 +428,7 @@ class DataManager:
             )
             
             if not data or len(data) == 0:
-                print(f"No data for {symbol} on {prev_day}")
+                logger.warning("No data for %s on %s", symbol, prev_day)
                 return None
             
             # Get last row (should be only row for daily)
@@ -162,9 +443,23 @@ class DataManager:
             }
             
         except Exception as e:
-            print(f"Error fetching OHLC for {symbol}: {e}")
+            logger.warning("Error fetching OHLC for %s: %s", symbol, e)
             return None
     
+    def fetch_previous_day_ohlc_batch(self, symbols, date=None):
+        """
+        Fetch previous day OHLC for several symbols concurrently
+        
+        Kite has no multi-instrument historical endpoint, so the
+        per-symbol requests are submitted to the shared thread pool.
+        
+        Returns: dict {symbol: OHLC dict or None}
+        """
+        results = self.executor.map(
+            lambda s: self.fetch_previous_day_ohlc(s, date), symbols
+        )
+        return dict(zip(symbols, results))
+    
     def fetch_current_candle(self, symbol):
         """
         Fetch latest 3-minute candle
@@ -204,9 +499,18 @@ class DataManager:
             return candle
             
         except Exception as e:
-            print(f"Error fetching current candle for {symbol}: {e}")
+            logger.warning("Error fetching current candle for %s: %s", symbol, e)
             return None
     
+    def fetch_current_candles_batch(self, symbols):
+        """
+        Fetch latest 3-minute candle for several symbols concurrently
+        
+        Returns: dict {symbol: candle dict or None}
+        """
+        results = self.executor.map(self.fetch_current_candle, symbols)
+        return dict(zip(symbols, results))
+    
     def get_recent_candles(self, symbol, count=20):
         """
         Get recent candles for percentile calculation
@@ -221,17 +525,30 @@ class DataManager:
         
         Returns: List of candle dicts, oldest first
         """
-        # Check cache first
-        if symbol in self.candle_cache:
-            cached = list(self.candle_cache[symbol])
-            if len(cached) >= count:
-                return cached[-count:]
+        # Warm in-memory cache from disk after a restart
+        if symbol not in self.candle_cache:
+            self._load_disk_cache(symbol)
+        
+        # Fast path: warm cache with an up-to-date newest candle
+        buffer = self.candle_cache.get(symbol)
+        if buffer is not None and len(buffer) >= count and self._is_cache_fresh(buffer):
+            return buffer.to_candles(count)
         
-        # Fetch from API
+        # Warm cache: fetch only candles since the newest cached one. The
+        # delta never backfills, so a short buffer (e.g. single candles
+        # appended by fetch_current_candle) needs the cold fetch instead
+        if buffer is not None and symbol in self._warmed_up and len(buffer) >= count:
+            return self._fetch_candle_delta(symbol, buffer, count)
+        
+        # Cold start: fetch the whole day from the API
         try:
-            today = datetime.now().date()
-            from_date = datetime.combine(today, datetime.min.time())
+            # Bind once; reused for today's and previous day's ranges
+            combine = datetime.combine
+            min_time = datetime.min.time()
+            
             to_date = datetime.now()
+            today = to_date.date()
+            from_date = combine(today, min_time)
             
             data = self.kite.get_historical_data(
                 symbol=symbol,
@@ -240,22 +557,13 @@ class DataManager:
                 interval='3minute'
             )
             
-            candles = [
-                {
-                    'open': c['open'],
-                    'high': c['high'],
-                    'low': c['low'],
-                    'close': c['close'],
-                    'timestamp': c['date']
-                }
-                for c in data
-            ]
+            rows = _normalize_candles(data)
             
             # If not enough candles today, fetch from previous day
-            if len(candles) < count:
+            if len(rows) < count:
                 prev_day = self.get_previous_trading_day(today)
-                prev_from = datetime.combine(prev_day, datetime.min.time())
-                prev_to = datetime.combine(prev_day, datetime.max.time())
+                prev_from = combine(prev_day, min_time)
+                prev_to = combine(prev_day, datetime.max.time())
                 
                 prev_data = self.kite.get_historical_data(
                     symbol=symbol,
@@ -264,43 +572,103 @@ class DataManager:
                     interval='3minute'
                 )
                 
-                prev_candles = [
-                    {
-                        'open': c['open'],
-                        'high': c['high'],
-                        'low': c['low'],
-                        'close': c['close'],
-                        'timestamp': c['date']
-                    }
-                    for c in prev_data
-                ]
+                prev_rows = _normalize_candles(prev_data)
                 
                 # Combine: last N from prev day + today's candles
-                needed_from_prev = count - len(candles)
-                combined = prev_candles[-needed_from_prev:] + candles
-                candles = combined
+                needed_from_prev = count - len(rows)
+                rows = prev_rows[-needed_from_prev:] + rows
             
             # Update cache
-            self.candle_cache[symbol] = deque(candles, maxlen=self.max_cache_size)
+            buffer = CandleBuffer(self.max_cache_size)
+            buffer.extend_rows(rows)
+            with self._total_lock:
+                old_len = len(self.candle_cache.get(symbol, ()))
+                self.candle_cache[symbol] = buffer
+                self._total_candles += len(buffer) - old_len
+            self._warmed_up.add(symbol)
+            self.disk_cache.put(symbol, today, buffer)
             
-            return candles[-count:] if len(candles) >= count else candles
+            return buffer.to_candles(count)
             
         except Exception as e:
-            print(f"Error fetching recent candles for {symbol}: {e}")
+            logger.warning("Error fetching recent candles for %s: %s", symbol, e)
             return []
     
+    def _fetch_candle_delta(self, symbol, buffer, count):
+        """Fetch candles from the newest cached timestamp onwards and merge"""
+        try:
+            now = datetime.now()
+            data = self.kite.get_historical_data(
+                symbol=symbol,
+                from_date=buffer.last_timestamp(),
+                to_date=now,
+                interval='3minute'
+            )
+            
+            prev_len = len(buffer)
+            buffer.merge_rows(_normalize_candles(data))
+            self._count_candles(len(buffer) - prev_len)
+            self.disk_cache.put(symbol, now.date(), buffer)
+            
+            return buffer.to_candles(count)
+            
+        except Exception as e:
+            logger.warning("Error fetching candle delta for %s: %s", symbol, e)
+            return buffer.to_candles(count)
+    
+    def _is_cache_fresh(self, buffer):
+        """Check if newest cached candle is less than one interval old"""
+        last_ts = buffer.last_timestamp()
+        if last_ts is None:
+            return False
+        
+        # Kite timestamps are tz-aware; compare in the same zone
+        age = (datetime.now(last_ts.tzinfo) - last_ts).total_seconds()
+        return age < self.candle_interval_seconds
+    
     def _add_to_cache(self, symbol, candle):
-        """Add candle to in-memory cache"""
+        """
+        Add candle to in-memory cache
+        
+        Not written to disk: the buffer is persisted after window fetches
+        and delta merges, which keeps file I/O out of the polling path.
+        """
         if symbol not in self.candle_cache:
-            self.candle_cache[symbol] = deque(maxlen=self.max_cache_size)
+            self.candle_cache[symbol] = CandleBuffer(self.max_cache_size)
+        
+        buffer = self.candle_cache[symbol]
         
         # Avoid duplicates (check timestamp)
-        if self.candle_cache[symbol]:
-            last_candle = self.candle_cache[symbol][-1]
-            if last_candle['timestamp'] == candle['timestamp']:
-                return  # Already have this candle
+        if buffer.last_timestamp() == candle['timestamp']:
+            return  # Already have this candle
         
-        self.candle_cache[symbol].append(candle)
+        prev_len = len(buffer)
+        buffer.append(candle)
+        self._count_candles(len(buffer) - prev_len)
+    
+    def _count_candles(self, added):
+        """Adjust the running total_candles counter"""
+        with self._total_lock:
+            self._total_candles += added
+    
+    def _load_disk_cache(self, symbol):
+        """Load today's candles for symbol from disk into memory cache"""
+        buffer = self.disk_cache.get(symbol, datetime.now().date())
+        if isinstance(buffer, CandleBuffer):
+            self.candle_cache[symbol] = buffer
+            self._count_candles(len(buffer))
+            self._warmed_up.add(symbol)
+    
+    def get_recent_ohlc(self, symbol, count=20):
+        """
+        Get recent candles as an (n, 5) OHLCV array for vectorized maths
+        
+        Columns follow CandleBuffer.OPEN/HIGH/LOW/CLOSE/VOLUME, oldest first.
+        Returns an empty (0, 5) array if no candles are available.
+        """
+        if not self.get_recent_candles(symbol, count):
+            return np.empty((0, 5))
+        return self.candle_cache[symbol].array(count)
     
     def get_ltp(self, symbol):
         """
@@ -312,32 +680,54 @@ class DataManager:
             ltp = self.kite.get_ltp(symbol)
             return ltp
         except Exception as e:
-            print(f"Error fetching LTP for {symbol}: {e}")
+            logger.warning("Error fetching LTP for %s: %s", symbol, e)
             return None
     
+    def get_ltp_batch(self, symbols):
+        """
+        Get Last Traded Prices for several symbols with one API call
+        
+        Returns: dict {symbol: float}, empty on error
+        """
+        try:
+            return self.kite.get_ltps(list(symbols))
+        except Exception as e:
+            logger.warning("Error fetching LTPs for %s symbols: %s", len(symbols), e)
+            return {}
+    
+    def close(self):
+        """Shut down the shared executor (waits for in-flight API calls)"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+    
     def cleanup_cache(self):
         """Clear all cached data (call at EOD)"""
-        self.candle_cache.clear()
+        with self._total_lock:
+            self.candle_cache.clear()
+            self._total_candles = 0
+        self._warmed_up.clear()
+        self._expiry_asof = None
         self.symbol_cache.clear()
-        print("Data cache cleared")
+        _build_symbol.cache_clear()
+        self.disk_cache.clear()
+        logger.info("Data cache cleared")
     
     def get_cache_stats(self):
         """Get cache statistics for monitoring"""
         return {
             'cached_symbols': len(self.candle_cache),
-            'total_candles': sum(len(v) for v in self.candle_cache.values()),
-            'symbols': list(self.candle_cache.keys())
+            'total_candles': self._total_candles,
+            'symbols': list(self.candle_cache)
         }
 
 
 if __name__ == "__main__":
     # Test data manager (requires mock kite client)
     class MockKiteClient:
+        rng = np.random.default_rng()
+        
         def get_historical_data(self, symbol, from_date, to_date, interval):
             # Mock data
-            import random
             base_price = 145.0
-            data = []
             
             if interval == 'day':
                 return [{
@@ -348,18 +738,26 @@ if __name__ == "__main__":
                     'close': base_price + 2
                 }]
             else:  # 3minute
-                for i in range(20):
-                    data.append({
+                # One RNG call for all 20 candles: columns are O, H, L, C offsets
+                offsets = self.rng.uniform(
+                    low=[-2, 0, -3, -2], high=[2, 3, 0, 2], size=(20, 4)
+                )
+                return [
+                    {
                         'date': from_date + timedelta(minutes=3*i),
-                        'open': base_price + random.uniform(-2, 2),
-                        'high': base_price + random.uniform(0, 3),
-                        'low': base_price + random.uniform(-3, 0),
-                        'close': base_price + random.uniform(-2, 2)
-                    })
-                return data
+                        'open': base_price + o,
+                        'high': base_price + h,
+                        'low': base_price + l,
+                        'close': base_price + c
+                    }
+                    for i, (o, h, l, c) in enumerate(offsets.tolist())
+                ]
         
         def get_ltp(self, symbol):
             return 147.50
+        
+        def get_ltps(self, symbols):
+            return {symbol: 147.50 for symbol in symbols}
     
     config = {
         'trading': {
@@ -400,6 +798,15 @@ if __name__ == "__main__":
     candles = dm.get_recent_candles(symbol, 20)
     print(f"Fetched {len(candles)} candles")
     
+    # Test batch fetch
+    print("\nTesting batch current candles...")
+    batch = dm.fetch_current_candles_batch([symbol, dm.get_option_symbol(80100, 'PE')])
+    print(f"Fetched {sum(1 for c in batch.values() if c)} of {len(batch)} candles")
+    
+    # Test batch LTP
+    print("\nTesting batch LTP...")
+    print(f"LTPs: {dm.get_ltp_batch(list(batch))}")
+    
     # Test cache stats
     print("\nCache stats:")
     stats = dm.get_cache_stats()
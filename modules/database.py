@@ -3,14 +3,342 @@ Database Module
 SQLite operations for trade logging and analytics
 """
 
+import atexit
 import sqlite3
 import logging
+import time
+import queue
+import threading
+from operator import itemgetter
+from functools import lru_cache
+from collections import namedtuple, OrderedDict
 from datetime import datetime, date
 from typing import Dict, List, Optional
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Per-connection PRAGMAs (journal_mode is persistent, set once in init_database)
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',      # ~20MB page cache
+    'PRAGMA mmap_size=268435456',    # 256MB memory-mapped I/O
+)
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache (keyed by SQL text) reuses the prepared statement across calls
+_INSERT_TRADE_SQL = '''
+    INSERT INTO trades (
+        trade_id, date, instrument, symbol, strike, option_type,
+        entry_time, entry_price, entry_candle_low,
+        exit_time, exit_price, exit_reason,
+        scenario, structure, first_candle_entry,
+        target_price, sl_price, candles_held,
+        pnl_points, pnl_rupees, lot_size, re_entry,
+        pivot_pp, pivot_r1, pivot_r2, pivot_r3, pivot_r4, pivot_r5, pivot_s1
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(trade_id) DO NOTHING
+'''
+
+# Table options for the primary-key-keyed tables; STRICT needs SQLite 3.37+
+_KEYED_TABLE_OPTIONS = 'WITHOUT ROWID' + (
+    ', STRICT' if sqlite3.sqlite_version_info >= (3, 37, 0) else ''
+)
+
+# Signals are written to monthly shard tables (signals_YYYY_MM) so the
+# B-tree being appended to stays small; signals_all unions every shard
+_CREATE_SIGNALS_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        signal_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date DATE NOT NULL,
+        time TEXT NOT NULL,
+        instrument TEXT NOT NULL,
+        symbol TEXT NOT NULL,
+        strike INTEGER NOT NULL,
+        option_type TEXT NOT NULL,
+        
+        signal_type TEXT NOT NULL,
+        scenario INTEGER,
+        structure TEXT,
+        
+        candle_open REAL,
+        candle_high REAL,
+        candle_low REAL,
+        candle_close REAL,
+        candle_size_pct REAL,
+        is_significant BOOLEAN,
+        
+        pivot_pp REAL,
+        pivot_r1 REAL,
+        pivot_r2 REAL,
+        pivot_r3 REAL,
+        
+        action_taken BOOLEAN DEFAULT 0,
+        reason TEXT,
+        
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+_INSERT_SIGNAL_SQL = '''
+    INSERT INTO {table} (
+        date, time, instrument, symbol, strike, option_type,
+        signal_type, scenario, structure,
+        candle_open, candle_high, candle_low, candle_close,
+        candle_size_pct, is_significant,
+        pivot_pp, pivot_r1, pivot_r2, pivot_r3,
+        action_taken, reason
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_UPSERT_SUMMARY_SQL = '''
+    INSERT INTO daily_summary (
+        date, instrument, total_trades, wins, losses, win_rate,
+        gross_pnl, max_drawdown,
+        scenario_1_trades, scenario_2_trades, scenario_3_trades,
+        first_candle_entries, intraday_entries,
+        stop_losses, targets_hit, timeouts, eod_exits
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date) DO UPDATE SET
+        instrument = excluded.instrument,
+        total_trades = excluded.total_trades,
+        wins = excluded.wins,
+        losses = excluded.losses,
+        win_rate = excluded.win_rate,
+        gross_pnl = excluded.gross_pnl,
+        max_drawdown = excluded.max_drawdown,
+        scenario_1_trades = excluded.scenario_1_trades,
+        scenario_2_trades = excluded.scenario_2_trades,
+        scenario_3_trades = excluded.scenario_3_trades,
+        first_candle_entries = excluded.first_candle_entries,
+        intraday_entries = excluded.intraday_entries,
+        stop_losses = excluded.stop_losses,
+        targets_hit = excluded.targets_hit,
+        timeouts = excluded.timeouts,
+        eod_exits = excluded.eod_exits
+'''
+
+# One pass over the day's trades: counters, gross P&L, and max drawdown
+# (largest drop of cumulative P&L from its running peak, in entry order)
+_DAILY_SUMMARY_SQL = '''
+    WITH ordered AS (
+        SELECT
+            instrument, pnl_points, scenario, first_candle_entry, exit_reason,
+            COALESCE(pnl_rupees, 0) AS pnl,
+            SUM(COALESCE(pnl_rupees, 0)) OVER w AS running,
+            ROW_NUMBER() OVER w AS seq
+        FROM trades
+        WHERE date = ?
+        WINDOW w AS (ORDER BY entry_time, trade_id ROWS UNBOUNDED PRECEDING)
+    ),
+    drawdowns AS (
+        SELECT *,
+            MAX(running) OVER (ORDER BY seq ROWS UNBOUNDED PRECEDING) - running AS drawdown
+        FROM ordered
+    )
+    SELECT
+        COUNT(*) AS total_trades,
+        (SELECT instrument FROM ordered WHERE seq = 1) AS instrument,
+        SUM(CASE WHEN pnl_points > 0 THEN 1 ELSE 0 END) AS wins,
+        SUM(pnl) AS gross_pnl,
+        MAX(drawdown) AS max_drawdown,
+        SUM(CASE WHEN scenario = 1 THEN 1 ELSE 0 END) AS scenario_1_trades,
+        SUM(CASE WHEN scenario = 2 THEN 1 ELSE 0 END) AS scenario_2_trades,
+        SUM(CASE WHEN scenario = 3 THEN 1 ELSE 0 END) AS scenario_3_trades,
+        SUM(CASE WHEN first_candle_entry THEN 1 ELSE 0 END) AS first_candle_entries,
+        SUM(CASE WHEN exit_reason = 'STOP_LOSS' THEN 1 ELSE 0 END) AS stop_losses,
+        SUM(CASE WHEN exit_reason = 'TARGET' THEN 1 ELSE 0 END) AS targets_hit,
+        SUM(CASE WHEN exit_reason = '10_CANDLE_TIMEOUT' THEN 1 ELSE 0 END) AS timeouts,
+        SUM(CASE WHEN exit_reason = 'EOD' THEN 1 ELSE 0 END) AS eod_exits
+    FROM drawdowns
+'''
+
+# Fold newly logged trades into an existing daily_summary row
+_INCREMENT_SUMMARY_SQL = '''
+    UPDATE daily_summary SET
+        total_trades = total_trades + ?,
+        wins = wins + ?,
+        losses = losses + ?,
+        gross_pnl = gross_pnl + ?,
+        scenario_1_trades = scenario_1_trades + ?,
+        scenario_2_trades = scenario_2_trades + ?,
+        scenario_3_trades = scenario_3_trades + ?,
+        first_candle_entries = first_candle_entries + ?,
+        intraday_entries = intraday_entries + ?,
+        stop_losses = stop_losses + ?,
+        targets_hit = targets_hit + ?,
+        timeouts = timeouts + ?,
+        eod_exits = eod_exits + ?
+    WHERE date = ?
+'''
+
+# Drawdown depends on entry order, so it is refreshed from the (indexed)
+# day's trades rather than incremented
+_REFRESH_SUMMARY_RATIOS_SQL = '''
+    UPDATE daily_summary SET
+        win_rate = ROUND(100.0 * wins / total_trades, 2),
+        max_drawdown = (
+            SELECT MAX(peak - running) FROM (
+                SELECT running,
+                    MAX(running) OVER (ORDER BY seq ROWS UNBOUNDED PRECEDING) AS peak
+                FROM (
+                    SELECT
+                        SUM(COALESCE(pnl_rupees, 0)) OVER w AS running,
+                        ROW_NUMBER() OVER w AS seq
+                    FROM trades
+                    WHERE date = daily_summary.date
+                    WINDOW w AS (ORDER BY entry_time, trade_id ROWS UNBOUNDED PRECEDING)
+                )
+            )
+        )
+    WHERE date = ?
+'''
+
+_SUMMARY_COUNTERS = (
+    'total_trades', 'wins', 'losses',
+    'scenario_1_trades', 'scenario_2_trades', 'scenario_3_trades',
+    'first_candle_entries', 'intraday_entries',
+    'stop_losses', 'targets_hit', 'timeouts', 'eod_exits'
+)
+
+# Trade columns after trade_id/date/instrument, in _INSERT_TRADE_SQL order
+_TRADE_FIELDS = itemgetter(
+    'symbol', 'strike', 'option_type',
+    'entry_time', 'entry_price', 'entry_candle_low',
+    'exit_time', 'exit_price', 'exit_reason',
+    'scenario', 'structure', 'first_candle_entry',
+    'target_price', 'sl_price', 'candles_held',
+    'pnl_points', 'pnl_rupees', 'lot_size', 're_entry',
+    'pivot_pp', 'pivot_r1', 'pivot_r2', 'pivot_r3', 'pivot_r4', 'pivot_r5', 'pivot_s1'
+)
+
+
+@lru_cache(maxsize=32)
+def _row_type(name, fields):
+    """Namedtuple class for a result set's column names (one per query shape)"""
+    return namedtuple(name, fields)
+
+
+# (epoch second, date, 'HH:MM:SS') of the last _clock() refresh; swapped as
+# one tuple so concurrent loggers never see a torn value
+_clock_state = (None, None, None)
+
+
+def _clock():
+    """Today's date and 'HH:MM:SS', recomputed at most once per second"""
+    global _clock_state
+    second, today, now_time = _clock_state
+    current = int(time.time())
+    if second != current:
+        now = datetime.now()
+        today, now_time = now.date(), now.strftime('%H:%M:%S')
+        _clock_state = (current, today, now_time)
+    return today, now_time
+
+
+def _open_connection(db_path, timeout=10.0):
+    """Open a connection with the tuned per-connection PRAGMAs applied"""
+    conn = sqlite3.connect(
+        db_path,
+        timeout=timeout,
+        check_same_thread=False,
+        cached_statements=256,
+        isolation_level=None  # transactions are managed by Database
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _signal_shard_name(signal_date):
+    """Monthly signals table for a date (or ISO date string), e.g. signals_2025_10"""
+    if isinstance(signal_date, str):
+        signal_date = date.fromisoformat(signal_date[:10])
+    return f"signals_{signal_date.year}_{signal_date.month:02d}"
+
+
+def _close_connection(conn):
+    """Let SQLite refresh planner stats from this connection's queries, then close"""
+    try:
+        conn.execute('PRAGMA optimize')
+    except sqlite3.Error as e:
+        logger.warning(f"PRAGMA optimize failed: {e}")
+    conn.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived SQLite connections
+    
+    Connections are opened lazily up to `size` and reused, so the page
+    cache stays warm and PRAGMA setup is paid once per connection.
+    """
+    
+    def __init__(self, db_path, size=4, timeout=10.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._pool = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._created = 0
+    
+    def _create_connection(self):
+        return _open_connection(self.db_path, self.timeout)
+    
+    def _new_connection(self):
+        """Open a connection if the pool is below size, else return None"""
+        with self._lock:
+            if self._created >= self.size:
+                return None
+            self._created += 1
+        try:
+            return self._create_connection()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+    
+    def get_connection(self):
+        """Check out a live connection, waiting up to timeout if all are busy"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._new_connection()
+            if conn is not None:
+                return conn
+            try:
+                conn = self._pool.get(timeout=self.timeout)
+            except queue.Empty:
+                raise sqlite3.OperationalError("Timed out waiting for a database connection")
+        
+        # Replace connections that died while idle
+        try:
+            conn.execute('SELECT 1')
+        except sqlite3.Error:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            conn = self._create_connection()
+        return conn
+    
+    def return_connection(self, conn):
+        """Hand a connection back to the pool"""
+        self._pool.put_nowait(conn)
+    
+    def close_all(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            _close_connection(conn)
+            with self._lock:
+                self._created -= 1
+
 
 class Database:
     def __init__(self, db_path='data/trading.db'):
@@ -21,33 +349,176 @@ class Database:
             db_path: Path to SQLite database file
         """
         self.db_path = db_path
+        
+        # Under WAL readers never block on the writer, so reads get their
+        # own pool and all writes go through one connection behind a lock
+        self._read_pool = ConnectionPool(db_path, size=4)
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+        
+        # Monthly signal shard tables known to exist (filled by init_database)
+        self._signal_shards = set()
+        
+        # get_daily_trades results by ISO date (LRU); the version counter
+        # stops a read that raced a trade write from caching stale rows
+        self.daily_cache_size = 90
+        self._daily_cache = OrderedDict()
+        self._daily_cache_version = 0
+        self._daily_cache_lock = threading.Lock()
+        
         self.init_database()
+        
+        # log_signal only enqueues; one background thread drains the queue in
+        # batches so the trading loop never waits on a commit. Trades are few
+        # and are money records, so log_trade stays synchronous
+        self.write_batch_size = 256
+        self.write_batch_wait = 0.05  # seconds to wait for more rows per batch
+        self._write_queue = queue.Queue(maxsize=10000)
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, name='db-writer', daemon=True
+        )
+        self._writer_thread.start()
+        
+        # Daemon thread, so drain the queue at interpreter exit too
+        atexit.register(self.close)
+    
+    def _writer_loop(self):
+        """Background writer: batch queued signals into bulk inserts"""
+        while True:
+            item = self._write_queue.get()
+            batch = [item]
+            
+            # Coalesce whatever arrives shortly after into the same commit
+            deadline = time.monotonic() + self.write_batch_wait
+            while item is not None and len(batch) < self.write_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._write_queue.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            
+            try:
+                signals = [payload for payload in batch if payload is not None]
+                if signals:
+                    self.log_signals_bulk(signals)
+            except Exception as e:
+                logger.error(f"Background writer error: {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+            
+            if batch[-1] is None:
+                return
+    
+    def flush(self):
+        """Block until every queued signal has been written"""
+        if self._writer_thread.is_alive():
+            self._write_queue.join()
+    
+    def get_connection(self, write=True):
+        """
+        Context manager for database connections
+        
+        Args:
+            write: True for the writer connection (one transaction),
+                   False for a pooled read-only connection
+        """
+        if write:
+            return self.get_write_connection()
+        return self.get_read_connection()
     
     @contextmanager
-    def get_connection(self):
-        """Context manager for database connections"""
-        conn = sqlite3.connect(self.db_path, timeout=10.0)
-        conn.row_factory = sqlite3.Row
+    def get_read_connection(self):
+        """Check out a pooled connection for reads (autocommit, no write lock)"""
+        conn = self._read_pool.get_connection()
         try:
             yield conn
-            conn.commit()
         except Exception as e:
-            conn.rollback()
             logger.error(f"Database error: {e}")
             raise
         finally:
-            conn.close()
+            self._read_pool.return_connection(conn)
+    
+    @contextmanager
+    def get_write_connection(self):
+        """Run the block in a BEGIN IMMEDIATE transaction on the writer connection"""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = _open_connection(self.db_path)
+            conn = self._write_conn
+            
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                yield conn
+                conn.execute('COMMIT')
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                logger.error(f"Database error: {e}")
+                raise
+    
+    def close(self):
+        """Flush queued writes, stop the writer thread and close all connections"""
+        atexit.unregister(self.close)
+        if self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        
+        with self._write_lock:
+            if self._write_conn is not None:
+                _close_connection(self._write_conn)
+                self._write_conn = None
+        self._read_pool.close_all()
+    
+    def maintain(self):
+        """
+        Nightly maintenance: refresh planner statistics and truncate the WAL
+        
+        Run once the trading day is over so it never competes with logging.
+        """
+        try:
+            with self.get_write_connection() as conn:
+                # Signals live in the monthly signals_YYYY_MM shards, so
+                # analyze every one of them alongside the base tables
+                shards = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'signals_[0-9]*'"
+                )]
+                for table in ['trades', 'signals', *sorted(shards)]:
+                    conn.execute(f'ANALYZE "{table}"')
+            
+            # Checkpointing can't run inside a transaction
+            with self._write_lock:
+                busy, log_pages, checkpointed = self._write_conn.execute(
+                    'PRAGMA wal_checkpoint(TRUNCATE)'
+                ).fetchone()
+            
+            logger.info(f"Database maintenance done (WAL pages checkpointed: {checkpointed})")
+            return not busy
+            
+        except sqlite3.Error as e:
+            logger.error(f"Database maintenance failed: {e}")
+            return False
     
     def init_database(self):
         """Create database tables if they don't exist"""
-        with self.get_connection() as conn:
+        # WAL lets readers run alongside the trade/signal writer and with
+        # synchronous=NORMAL avoids an fsync per commit. The journal mode
+        # can't change inside a transaction, so set it first.
+        with self.get_read_connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+        
+        with self.get_write_connection() as conn:
             cursor = conn.cursor()
             
+            # Trades and daily_summary are keyed lookups, so they are stored
+            # clustered on their primary key (WITHOUT ROWID) with strict types.
+            # Existing databases keep the tables they were created with.
             # Trades table
-            cursor.execute('''
+            cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS trades (
                     trade_id TEXT PRIMARY KEY,
-                    date DATE NOT NULL,
+                    date TEXT NOT NULL,
                     instrument TEXT NOT NULL,
                     symbol TEXT NOT NULL,
                     strike INTEGER NOT NULL,
@@ -63,7 +534,7 @@ class Database:
                     
                     scenario INTEGER NOT NULL,
                     structure TEXT NOT NULL,
-                    first_candle_entry BOOLEAN NOT NULL,
+                    first_candle_entry INTEGER NOT NULL,
                     
                     target_price REAL NOT NULL,
                     sl_price REAL NOT NULL,
@@ -73,7 +544,7 @@ class Database:
                     pnl_rupees REAL,
                     lot_size INTEGER NOT NULL,
                     
-                    re_entry BOOLEAN DEFAULT 0,
+                    re_entry INTEGER DEFAULT 0,
                     
                     pivot_pp REAL,
                     pivot_r1 REAL,
@@ -83,14 +554,14 @@ class Database:
                     pivot_r5 REAL,
                     pivot_s1 REAL,
                     
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ) {_KEYED_TABLE_OPTIONS}
             ''')
             
             # Daily summary table
-            cursor.execute('''
+            cursor.execute(f'''
                 CREATE TABLE IF NOT EXISTS daily_summary (
-                    date DATE PRIMARY KEY,
+                    date TEXT PRIMARY KEY,
                     instrument TEXT NOT NULL,
                     
                     total_trades INTEGER NOT NULL,
@@ -113,50 +584,31 @@ class Database:
                     timeouts INTEGER DEFAULT 0,
                     eod_exits INTEGER DEFAULT 0,
                     
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                ) {_KEYED_TABLE_OPTIONS}
             ''')
             
-            # Signals log table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS signals (
-                    signal_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date DATE NOT NULL,
-                    time TEXT NOT NULL,
-                    instrument TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    strike INTEGER NOT NULL,
-                    option_type TEXT NOT NULL,
-                    
-                    signal_type TEXT NOT NULL,
-                    scenario INTEGER,
-                    structure TEXT,
-                    
-                    candle_open REAL,
-                    candle_high REAL,
-                    candle_low REAL,
-                    candle_close REAL,
-                    candle_size_pct REAL,
-                    is_significant BOOLEAN,
-                    
-                    pivot_pp REAL,
-                    pivot_r1 REAL,
-                    pivot_r2 REAL,
-                    pivot_r3 REAL,
-                    
-                    action_taken BOOLEAN DEFAULT 0,
-                    reason TEXT,
-                    
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # Legacy signals table; new signals go to monthly shards (see
+            # _signal_shard) but older rows stay queryable via signals_all
+            cursor.execute(_CREATE_SIGNALS_SQL.format(table='signals'))
             
             # Create indexes
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_date ON trades(date)')
+            # (date, entry_time) serves get_daily_trades' ORDER BY without a sort;
+            # it also covers every date-only lookup, so idx_trades_date is dropped
+            cursor.execute('DROP INDEX IF EXISTS idx_trades_date')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_date_entry ON trades(date, entry_time)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_date_scenario ON trades(date, scenario, exit_reason)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_trades_scenario ON trades(scenario)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_date ON signals(date)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_date_time ON signals(date, time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_symbol ON signals(symbol)')
             
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB 'signals_[0-9]*'"
+            )
+            self._signal_shards = {row['name'] for row in cursor.fetchall()}
+            self._create_signals_view(cursor, self._signal_shards)
+            
             logger.info("Database initialized successfully")
     
     def log_trade(self, trade_result: Dict) -> bool:
@@ -167,115 +619,204 @@ class Database:
             trade_result: Dictionary from TradeResult.to_dict()
         
         Returns:
-            True if successful
+            True if written (False on error or if trade_id is already logged)
         """
+        return self.log_trades_bulk([trade_result]) == 1
+    
+    def log_trades_bulk(self, trade_results: List[Dict]) -> int:
+        """
+        Log several completed trades in a single transaction
+        
+        Trades whose trade_id is already logged are skipped. The day's
+        daily_summary row is updated in the same transaction.
+        
+        Args:
+            trade_results: List of dictionaries from TradeResult.to_dict()
+        
+        Returns:
+            Number of trades written (0 on error; all rows or none are written)
+        """
+        if not trade_results:
+            return 0
+        
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO trades (
-                        trade_id, date, instrument, symbol, strike, option_type,
-                        entry_time, entry_price, entry_candle_low,
-                        exit_time, exit_price, exit_reason,
-                        scenario, structure, first_candle_entry,
-                        target_price, sl_price, candles_held,
-                        pnl_points, pnl_rupees, lot_size, re_entry,
-                        pivot_pp, pivot_r1, pivot_r2, pivot_r3, pivot_r4, pivot_r5, pivot_s1
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    trade_result['trade_id'],
-                    datetime.now().date(),
-                    trade_result.get('instrument', 'SENSEX'),
-                    trade_result['symbol'],
-                    trade_result['strike'],
-                    trade_result['option_type'],
-                    trade_result['entry_time'],
-                    trade_result['entry_price'],
-                    trade_result['entry_candle_low'],
-                    trade_result['exit_time'],
-                    trade_result['exit_price'],
-                    trade_result['exit_reason'],
-                    trade_result['scenario'],
-                    trade_result['structure'],
-                    trade_result['first_candle_entry'],
-                    trade_result['target_price'],
-                    trade_result['sl_price'],
-                    trade_result['candles_held'],
-                    trade_result['pnl_points'],
-                    trade_result['pnl_rupees'],
-                    trade_result['lot_size'],
-                    trade_result['re_entry'],
-                    trade_result['pivot_pp'],
-                    trade_result['pivot_r1'],
-                    trade_result['pivot_r2'],
-                    trade_result['pivot_r3'],
-                    trade_result['pivot_r4'],
-                    trade_result['pivot_r5'],
-                    trade_result['pivot_s1']
-                ))
-                
-                logger.info(f"Trade logged: {trade_result['trade_id']}")
-                return True
+            today = _clock()[0]
+            rows = [
+                (t['trade_id'], today, t.get('instrument', 'SENSEX'), *_TRADE_FIELDS(t))
+                for t in trade_results
+            ]
+            
+            with self.get_write_connection() as conn:
+                logged = []
+                for trade_result, row in zip(trade_results, rows):
+                    if conn.execute(_INSERT_TRADE_SQL, row).rowcount:
+                        logged.append(trade_result)
+                if logged:
+                    self._add_to_daily_summary(conn, today, logged)
+            inserted = len(logged)
+            
+            if inserted:
+                with self._daily_cache_lock:
+                    self._daily_cache.pop(str(today), None)
+                    self._daily_cache_version += 1
+            
+            if inserted < len(rows):
+                logger.warning(f"Skipped {len(rows) - inserted} already-logged trade(s)")
+            if len(rows) == 1:
+                if inserted:
+                    logger.info(f"Trade logged: {rows[0][0]}")
+            else:
+                logger.info(f"{inserted} trades logged")
+            return inserted
                 
-        except Exception as e:
+        except sqlite3.Error as e:
             logger.error(f"Error logging trade: {e}")
-            return False
+            return 0
+    
+    def _add_to_daily_summary(self, conn, trade_date, trades: List[Dict]):
+        """Fold newly inserted trades into the running daily_summary row"""
+        exists = conn.execute(
+            'SELECT 1 FROM daily_summary WHERE date = ?', (trade_date,)
+        ).fetchone()
+        if not exists:
+            # First trade of the day (or trades logged before the rollup
+            # existed): build the row from the table
+            self._rebuild_daily_summary(conn, trade_date)
+            return
+        
+        total = len(trades)
+        wins = sum(1 for t in trades if t['pnl_points'] and t['pnl_points'] > 0)
+        first_candle = sum(1 for t in trades if t['first_candle_entry'])
+        exit_reasons = [t['exit_reason'] for t in trades]
+        scenarios = [t['scenario'] for t in trades]
+        
+        conn.execute(_INCREMENT_SUMMARY_SQL, (
+            total, wins, total - wins,
+            sum(t['pnl_rupees'] or 0 for t in trades),
+            scenarios.count(1), scenarios.count(2), scenarios.count(3),
+            first_candle, total - first_candle,
+            exit_reasons.count('STOP_LOSS'), exit_reasons.count('TARGET'),
+            exit_reasons.count('10_CANDLE_TIMEOUT'), exit_reasons.count('EOD'),
+            trade_date
+        ))
+        conn.execute(_REFRESH_SUMMARY_RATIOS_SQL, (trade_date,))
+    
+    def _rebuild_daily_summary(self, conn, trade_date):
+        """Recompute the daily_summary row for trade_date from the trades table"""
+        row = conn.execute(_DAILY_SUMMARY_SQL, (trade_date,)).fetchone()
+        total_trades = row['total_trades']
+        if not total_trades:
+            return
+        
+        wins = row['wins']
+        conn.execute(_UPSERT_SUMMARY_SQL, (
+            trade_date, row['instrument'],
+            total_trades, wins, total_trades - wins,
+            round(wins / total_trades * 100, 2),
+            row['gross_pnl'], row['max_drawdown'],
+            row['scenario_1_trades'], row['scenario_2_trades'], row['scenario_3_trades'],
+            row['first_candle_entries'], total_trades - row['first_candle_entries'],
+            row['stop_losses'], row['targets_hit'], row['timeouts'], row['eod_exits']
+        ))
+    
+    def _create_signal_shards(self, conn, tables):
+        """Create monthly signal tables (with indexes) and add them to signals_all"""
+        for table in tables:
+            conn.execute(_CREATE_SIGNALS_SQL.format(table=table))
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_date_time ON {table}(date, time)')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_symbol ON {table}(symbol)')
+        self._create_signals_view(conn, self._signal_shards.union(tables))
+    
+    def _create_signals_view(self, conn, shards):
+        """(Re)create signals_all as a UNION ALL over the legacy table and every shard"""
+        selects = ' UNION ALL '.join(
+            f'SELECT * FROM {table}' for table in ['signals', *sorted(shards)]
+        )
+        conn.execute('DROP VIEW IF EXISTS signals_all')
+        conn.execute(f'CREATE VIEW signals_all AS {selects}')
     
     def log_signal(self, signal_data: Dict) -> bool:
         """
-        Log entry/exit signal to database
+        Queue an entry/exit signal for the background writer
         
         Args:
             signal_data: Dictionary with signal details
         
         Returns:
-            True if successful
+            True once queued (written inline if the queue is full); call
+            flush() to wait for the commit
         """
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute('''
-                    INSERT INTO signals (
-                        date, time, instrument, symbol, strike, option_type,
-                        signal_type, scenario, structure,
-                        candle_open, candle_high, candle_low, candle_close,
-                        candle_size_pct, is_significant,
-                        pivot_pp, pivot_r1, pivot_r2, pivot_r3,
-                        action_taken, reason
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    signal_data.get('date', datetime.now().date()),
-                    signal_data.get('time', datetime.now().strftime('%H:%M:%S')),
-                    signal_data.get('instrument', 'SENSEX'),
-                    signal_data['symbol'],
-                    signal_data['strike'],
-                    signal_data['option_type'],
-                    signal_data['signal_type'],
-                    signal_data.get('scenario'),
-                    signal_data.get('structure'),
-                    signal_data.get('candle_open'),
-                    signal_data.get('candle_high'),
-                    signal_data.get('candle_low'),
-                    signal_data.get('candle_close'),
-                    signal_data.get('candle_size_pct'),
-                    signal_data.get('is_significant'),
-                    signal_data.get('pivot_pp'),
-                    signal_data.get('pivot_r1'),
-                    signal_data.get('pivot_r2'),
-                    signal_data.get('pivot_r3'),
-                    signal_data.get('action_taken', False),
-                    signal_data.get('reason', '')
-                ))
-                
-                return True
+            self._write_queue.put_nowait(signal_data)
+            return True
+        except queue.Full:
+            logger.warning("Database write queue full, writing inline")
+            return self.log_signals_bulk([signal_data])
+    
+    def log_signals_bulk(self, signals: List[Dict]) -> bool:
+        """
+        Log several entry/exit signals in a single transaction
+        
+        Args:
+            signals: List of dictionaries with signal details
+        
+        Returns:
+            True if successful (all rows are written or none are)
+        """
+        if not signals:
+            return True
+        
+        try:
+            today, now_time = _clock()
+            rows = [
+                (
+                    s.get('date', today),
+                    s.get('time', now_time),
+                    s.get('instrument', 'SENSEX'),
+                    s['symbol'],
+                    s['strike'],
+                    s['option_type'],
+                    s['signal_type'],
+                    s.get('scenario'),
+                    s.get('structure'),
+                    s.get('candle_open'),
+                    s.get('candle_high'),
+                    s.get('candle_low'),
+                    s.get('candle_close'),
+                    s.get('candle_size_pct'),
+                    s.get('is_significant'),
+                    s.get('pivot_pp'),
+                    s.get('pivot_r1'),
+                    s.get('pivot_r2'),
+                    s.get('pivot_r3'),
+                    s.get('action_taken', False),
+                    s.get('reason', '')
+                )
+                for s in signals
+            ]
+            
+            # Group by month shard (a batch normally falls in a single month)
+            shards = {}
+            for row in rows:
+                shards.setdefault(_signal_shard_name(row[0]), []).append(row)
+            new_shards = shards.keys() - self._signal_shards
+            
+            with self.get_write_connection() as conn:
+                if new_shards:
+                    self._create_signal_shards(conn, new_shards)
+                for table, shard_rows in shards.items():
+                    conn.executemany(_INSERT_SIGNAL_SQL.format(table=table), shard_rows)
+            
+            # Only remember shards once their DDL has committed
+            self._signal_shards |= new_shards
+            
+            return True
                 
         except Exception as e:
             logger.error(f"Error logging signal: {e}")
             return False
     
-    def get_daily_trades(self, trade_date: Optional[date] = None) -> List[Dict]:
+    def get_daily_trades(self, trade_date: Optional[date] = None) -> List[tuple]:
         """
         Get all trades for a specific date
         
@@ -283,21 +824,37 @@ class Database:
             trade_date: Date to query (default: today)
         
         Returns:
-            List of trade dictionaries
+            List of Trade namedtuples (columns as attributes, e.g. trade.pnl_points)
         """
         if trade_date is None:
-            trade_date = datetime.now().date()
+            trade_date = _clock()[0]
+        
+        key = str(trade_date)
+        with self._daily_cache_lock:
+            cached = self._daily_cache.get(key)
+            if cached is not None:
+                self._daily_cache.move_to_end(key)
+                return list(cached)
+            version = self._daily_cache_version
         
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = None
                 cursor.execute(
                     'SELECT * FROM trades WHERE date = ? ORDER BY entry_time',
                     (trade_date,)
                 )
                 
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                Trade = _row_type('Trade', tuple(col[0] for col in cursor.description))
+                trades = list(map(Trade._make, cursor.fetchall()))
+            
+            with self._daily_cache_lock:
+                if version == self._daily_cache_version:
+                    self._daily_cache[key] = trades
+                    if len(self._daily_cache) > self.daily_cache_size:
+                        self._daily_cache.popitem(last=False)
+            return list(trades)
                 
         except Exception as e:
             logger.error(f"Error fetching daily trades: {e}")
@@ -305,7 +862,7 @@ class Database:
     
     def generate_daily_summary(self, trade_date: Optional[date] = None) -> Dict:
         """
-        Generate and save daily summary
+        Get the daily summary (maintained incrementally by log_trades_bulk)
         
         Args:
             trade_date: Date to summarize (default: today)
@@ -314,98 +871,38 @@ class Database:
             Summary dictionary
         """
         if trade_date is None:
-            trade_date = datetime.now().date()
+            trade_date = _clock()[0]
         
         try:
-            trades = self.get_daily_trades(trade_date)
+            with self.get_read_connection() as conn:
+                row = conn.execute(
+                    'SELECT * FROM daily_summary WHERE date = ?', (trade_date,)
+                ).fetchone()
+            
+            if row is None:
+                # Day not rolled up yet (e.g. a past date): build it now
+                with self.get_write_connection() as conn:
+                    self._rebuild_daily_summary(conn, trade_date)
+                    row = conn.execute(
+                        'SELECT * FROM daily_summary WHERE date = ?', (trade_date,)
+                    ).fetchone()
             
-            if not trades:
+            if row is None or not row['total_trades']:
                 return {
                     'date': trade_date,
                     'total_trades': 0,
                     'message': 'No trades today'
                 }
             
-            # Calculate metrics
-            total_trades = len(trades)
-            wins = sum(1 for t in trades if t['pnl_points'] and t['pnl_points'] > 0)
-            losses = total_trades - wins
-            win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
-            
-            gross_pnl = sum(t['pnl_rupees'] or 0 for t in trades)
-            
-            # Count by scenario
-            scenario_1 = sum(1 for t in trades if t['scenario'] == 1)
-            scenario_2 = sum(1 for t in trades if t['scenario'] == 2)
-            scenario_3 = sum(1 for t in trades if t['scenario'] == 3)
-            
-            # Count entry types
-            first_candle = sum(1 for t in trades if t['first_candle_entry'])
-            intraday = total_trades - first_candle
-            
-            # Count exit reasons
-            stop_losses = sum(1 for t in trades if t['exit_reason'] == 'STOP_LOSS')
-            targets = sum(1 for t in trades if t['exit_reason'] == 'TARGET')
-            timeouts = sum(1 for t in trades if t['exit_reason'] == '10_CANDLE_TIMEOUT')
-            eod_exits = sum(1 for t in trades if t['exit_reason'] == 'EOD')
-            
-            # Max drawdown (simple calculation)
-            cumulative_pnl = []
-            running_pnl = 0
-            for trade in trades:
-                running_pnl += trade['pnl_rupees'] or 0
-                cumulative_pnl.append(running_pnl)
-            
-            max_dd = 0
-            if cumulative_pnl:
-                peak = cumulative_pnl[0]
-                for pnl in cumulative_pnl:
-                    if pnl > peak:
-                        peak = pnl
-                    dd = peak - pnl
-                    if dd > max_dd:
-                        max_dd = dd
-            
             summary = {
                 'date': trade_date,
-                'instrument': trades[0]['instrument'] if trades else 'SENSEX',
-                'total_trades': total_trades,
-                'wins': wins,
-                'losses': losses,
-                'win_rate': round(win_rate, 2),
-                'gross_pnl': round(gross_pnl, 2),
-                'max_drawdown': round(max_dd, 2),
-                'scenario_1_trades': scenario_1,
-                'scenario_2_trades': scenario_2,
-                'scenario_3_trades': scenario_3,
-                'first_candle_entries': first_candle,
-                'intraday_entries': intraday,
-                'stop_losses': stop_losses,
-                'targets_hit': targets,
-                'timeouts': timeouts,
-                'eod_exits': eod_exits
+                'instrument': row['instrument'],
+                'win_rate': row['win_rate'],
+                'gross_pnl': round(row['gross_pnl'], 2),
+                'max_drawdown': round(row['max_drawdown'], 2),
             }
-            
-            # Save to database
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO daily_summary (
-                        date, instrument, total_trades, wins, losses, win_rate,
-                        gross_pnl, max_drawdown,
-                        scenario_1_trades, scenario_2_trades, scenario_3_trades,
-                        first_candle_entries, intraday_entries,
-                        stop_losses, targets_hit, timeouts, eod_exits
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    summary['date'], summary['instrument'],
-                    summary['total_trades'], summary['wins'], summary['losses'],
-                    summary['win_rate'], summary['gross_pnl'], summary['max_drawdown'],
-                    summary['scenario_1_trades'], summary['scenario_2_trades'],
-                    summary['scenario_3_trades'], summary['first_candle_entries'],
-                    summary['intraday_entries'], summary['stop_losses'],
-                    summary['targets_hit'], summary['timeouts'], summary['eod_exits']
-                ))
+            for key in _SUMMARY_COUNTERS:
+                summary[key] = row[key]
             
             logger.info(f"Daily summary generated for {trade_date}")
             return summary
@@ -416,8 +913,12 @@ class Database:
     
     def get_monthly_stats(self, year: int, month: int) -> Dict:
         """Get monthly trading statistics"""
+        # Half-open date range keeps the filter indexable on trades(date)
+        start = date(year, month, 1)
+        end = date(year + (month == 12), month % 12 + 1, 1)
+        
         try:
-            with self.get_connection() as conn:
+            with self.get_read_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT 
@@ -428,8 +929,8 @@ class Database:
                         MAX(pnl_rupees) as best_trade,
                         MIN(pnl_rupees) as worst_trade
                     FROM trades
-                    WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?
-                ''', (str(year), f'{month:02d}'))
+                    WHERE date >= ? AND date < ?
+                ''', (start, end))
                 
                 row = cursor.fetchone()
                 return dict(row) if row else {}
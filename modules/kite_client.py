@@ -4,15 +4,87 @@ Wrapper for Kite Connect API with error handling and retry logic
 """
 
 from kiteconnect import KiteConnect
+from kiteconnect.exceptions import NetworkException
+import requests
+import functools
+import os
+import sys
+import glob
+import pickle
 import time
-from datetime import datetime
+import threading
+from datetime import date
+from collections import deque
+from operator import itemgetter
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Kite's ltp/quote endpoints accept at most this many instruments per call
+MAX_INSTRUMENTS_PER_REQUEST = 500
+
+# Instrument fields cached per trading symbol, stored column-wise. Only
+# what the client reads itself; see get_instrument_full() for the rest.
+INSTRUMENT_COLUMNS = (
+    ('instrument_token', np.int64),
+    ('lot_size', np.int32),
+    ('exchange', object),
+)
+
+# Symbol prefix -> exchange whose dump lists it; anything else is NFO
+_PREFIX_EXCHANGE = {
+    'SENSEX': 'BFO',
+    'BANKEX': 'BFO',
+}
+
+
+def _exchange_for(symbol):
+    """Exchange to load instruments from for a trading symbol"""
+    return _PREFIX_EXCHANGE.get(symbol[:6], 'NFO')
+
+
+# Errors worth retrying: throttling (429) and gateway/connection failures
+RETRYABLE_ERRORS = (
+    NetworkException,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+# Circuit breaker: more than CIRCUIT_MAX_FAILURES retryable failures within
+# CIRCUIT_WINDOW seconds fails every call fast for CIRCUIT_COOLDOWN seconds
+CIRCUIT_MAX_FAILURES = 5
+CIRCUIT_WINDOW = 10.0
+CIRCUIT_COOLDOWN = 30.0
+
+
+def _retry(tries=3, backoff=0.25, retry_on=RETRYABLE_ERRORS):
+    """
+    Retry a read-only KiteClient call on transient errors
+    
+    Sleeps backoff * 2**attempt between attempts and feeds every failure
+    to the client's circuit breaker. Never use on order placement.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            self._check_circuit()
+            for attempt in range(tries):
+                try:
+                    return method(self, *args, **kwargs)
+                except retry_on as e:
+                    self._record_failure()
+                    if attempt == tries - 1 or self._circuit_open_until:
+                        raise
+                    delay = backoff * 2 ** attempt
+                    logger.warning("%s failed (%s), retrying in %.2fs", method.__name__, e, delay)
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
 
 class KiteClient:
-    def __init__(self, api_key, api_secret, access_token=None):
+    def __init__(self, api_key, api_secret, access_token=None, cache_dir='data/cache'):
         """
         Initialize Kite Connect client
         
@@ -20,6 +92,7 @@ class KiteClient:
             api_key: Your API key
             api_secret: Your API secret
             access_token: Access token (if already authenticated)
+            cache_dir: Directory for the daily instrument dump cache
         """
         self.api_key = api_key
         self.api_secret = api_secret
@@ -31,9 +104,55 @@ class KiteClient:
         else:
             self.access_token = None
         
-        # Cache for instrument tokens
-        self.instrument_cache = {}
-        self.instruments_loaded = False
+        # Instrument cache: one array per field plus symbol -> row index
+        self._instrument_columns = {
+            field: np.empty(0, dtype=dtype) for field, dtype in INSTRUMENT_COLUMNS
+        }
+        self._symbol_idx = {}
+        self.instruments_loaded = set()  # Exchanges loaded so far
+        self.cache_dir = cache_dir
+        
+        # Net positions indexed by (tradingsymbol, product), refreshed after
+        # positions_ttl seconds or whenever we place/cancel an order
+        self.positions_ttl = 2.0
+        self._positions_cache = (0.0, None)
+        
+        # Last traded prices: {symbol: (monotonic time, price)}, reused for
+        # ltp_ttl seconds so repeated lookups within a tick share one request
+        self.ltp_ttl = 0.5
+        self._ltp_cache = {}
+        
+        # Circuit breaker state (see _retry). Calls arrive concurrently
+        # from DataManager's executor, so it is only touched under the lock
+        self._failure_times = deque()
+        self._circuit_open_until = 0.0
+        self._circuit_lock = threading.Lock()
+    
+    def _check_circuit(self):
+        """Fail fast while the circuit is open"""
+        with self._circuit_lock:
+            if not self._circuit_open_until:
+                return
+            remaining = self._circuit_open_until - time.monotonic()
+            if remaining <= 0:
+                self._circuit_open_until = 0.0
+                return
+        raise NetworkException(f"Kite API circuit open, retry in {remaining:.0f}s")
+    
+    def _record_failure(self):
+        """Count a transient failure; open the circuit if they pile up"""
+        with self._circuit_lock:
+            now = time.monotonic()
+            failures = self._failure_times
+            failures.append(now)
+            while failures and now - failures[0] > CIRCUIT_WINDOW:
+                failures.popleft()
+            
+            if len(failures) <= CIRCUIT_MAX_FAILURES:
+                return
+            failures.clear()
+            self._circuit_open_until = now + CIRCUIT_COOLDOWN
+        logger.error("Kite API failing repeatedly, pausing calls for %.0fs", CIRCUIT_COOLDOWN)
     
     def set_access_token(self, access_token):
         """Set access token after authentication"""
@@ -45,9 +164,10 @@ class KiteClient:
         try:
             return self.kite.profile()
         except Exception as e:
-            logger.error(f"Error fetching profile: {e}")
+            logger.error("Error fetching profile: %s", e)
             raise
     
+    @_retry()
     def get_spot_price(self, symbol):
         """
         Get spot price for index
@@ -57,11 +177,16 @@ class KiteClient:
         
         Returns: float spot price
         """
+        price = self._cached_ltp(symbol)
+        if price is not None:
+            return price
         try:
             ltp_data = self.kite.ltp(symbol)
-            return ltp_data[symbol]['last_price']
+            price = ltp_data[symbol]['last_price']
+            self._ltp_cache[symbol] = (time.monotonic(), price)
+            return price
         except Exception as e:
-            logger.error(f"Error fetching spot price for {symbol}: {e}")
+            logger.error("Error fetching spot price for %s: %s", symbol, e)
             raise
     
     def load_instruments(self, exchange='BFO'):
@@ -73,30 +198,100 @@ class KiteClient:
             exchange: 'BFO' for BSE Futures & Options, 'NFO' for NSE
         """
         try:
-            logger.info(f"Loading instruments for {exchange}...")
-            instruments = self.kite.instruments(exchange)
-            
-            # Cache instruments by trading symbol
-            for inst in instruments:
-                symbol = inst['tradingsymbol']
-                self.instrument_cache[symbol] = {
-                    'instrument_token': inst['instrument_token'],
-                    'exchange_token': inst['exchange_token'],
-                    'name': inst['name'],
-                    'expiry': inst['expiry'],
-                    'strike': inst['strike'],
-                    'lot_size': inst['lot_size'],
-                    'instrument_type': inst['instrument_type'],
-                    'exchange': inst['exchange']
+            # The dump only changes overnight, so reuse today's copy if present
+            cached = self._read_instrument_cache(exchange)
+            if cached is not None:
+                symbols, columns = cached
+                logger.info("Loading instruments for %s from disk cache...", exchange)
+            else:
+                logger.info("Loading instruments for %s...", exchange)
+                instruments = self.kite.instruments(exchange)
+                
+                count = len(instruments)
+                symbols = list(map(itemgetter('tradingsymbol'), instruments))
+                columns = {
+                    field: np.fromiter(map(itemgetter(field), instruments), dtype=dtype, count=count)
+                    for field, dtype in INSTRUMENT_COLUMNS
                 }
+                # A handful of distinct exchange names: keep one copy of each
+                columns['exchange'] = np.fromiter(
+                    map(sys.intern, columns['exchange']), dtype=object, count=count
+                )
+                self._write_instrument_cache(exchange, symbols, columns)
+            
+            # One canonical copy of each symbol, shared with the option
+            # symbols DataManager builds, so index probes compare by identity
+            symbols = list(map(sys.intern, symbols))
             
-            self.instruments_loaded = True
-            logger.info(f"Loaded {len(self.instrument_cache)} instruments")
+            # Cache instruments column-wise, indexed by trading symbol
+            offset = len(self._instrument_columns['instrument_token'])
+            for field, column in columns.items():
+                self._instrument_columns[field] = np.concatenate(
+                    (self._instrument_columns[field], column)
+                )
+            self._symbol_idx.update(zip(symbols, range(offset, offset + len(symbols))))
+            
+            self.instruments_loaded.add(exchange)
+            logger.info("Loaded %s instruments", len(self._symbol_idx))
             
         except Exception as e:
-            logger.error(f"Error loading instruments: {e}")
+            logger.error("Error loading instruments: %s", e)
             raise
     
+    def _instrument_cache_path(self, exchange):
+        return os.path.join(self.cache_dir, f"instruments_{exchange}_{date.today():%Y%m%d}.pkl")
+    
+    def _read_instrument_cache(self, exchange):
+        """Today's cached (symbols, columns) for exchange, or None"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._instrument_cache_path(exchange), 'rb') as f:
+                symbols, columns = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            logger.warning("Ignoring unreadable instrument cache for %s: %s", exchange, e)
+            return None
+        
+        # Written with a different column layout: refetch
+        if set(columns) != {field for field, _ in INSTRUMENT_COLUMNS}:
+            return None
+        return symbols, columns
+    
+    def _write_instrument_cache(self, exchange, symbols, columns):
+        """Save today's instrument dump and drop earlier days' files"""
+        if not self.cache_dir:
+            return
+        path = self._instrument_cache_path(exchange)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((symbols, columns), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            
+            for old_path in glob.glob(os.path.join(self.cache_dir, f"instruments_{exchange}_*.pkl")):
+                if old_path != path:
+                    os.remove(old_path)
+        except OSError as e:
+            logger.warning("Could not write instrument cache for %s: %s", exchange, e)
+    
+    def invalidate_instrument_cache(self):
+        """Drop cached instruments (memory and disk); the next lookup reloads them"""
+        self._instrument_columns = {
+            field: np.empty(0, dtype=dtype) for field, dtype in INSTRUMENT_COLUMNS
+        }
+        self._symbol_idx = {}
+        self.instruments_loaded = set()
+        
+        if self.cache_dir:
+            for path in glob.glob(os.path.join(self.cache_dir, 'instruments_*.pkl')):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    logger.warning("Could not remove %s: %s", path, e)
+    
     def get_instrument_token(self, symbol):
         """
         Get instrument token for a symbol
@@ -106,25 +301,58 @@ class KiteClient:
         
         Returns: instrument_token (int) or None
         """
-        if not self.instruments_loaded:
-            # Auto-load if not loaded
-            exchange = 'BFO' if 'SENSEX' in symbol else 'NFO'
-            self.load_instruments(exchange)
-        
-        if symbol in self.instrument_cache:
-            return self.instrument_cache[symbol]['instrument_token']
-        else:
-            logger.warning(f"Instrument token not found for {symbol}")
-            return None
+        token = self._instrument_field(symbol, 'instrument_token')
+        if token is None:
+            logger.warning("Instrument token not found for %s", symbol)
+        return token
     
     def get_instrument_details(self, symbol):
-        """Get full instrument details"""
-        if not self.instruments_loaded:
-            exchange = 'BFO' if 'SENSEX' in symbol else 'NFO'
-            self.load_instruments(exchange)
+        """Get cached instrument details (token, lot size, exchange) or None"""
+        idx = self._instrument_index(symbol)
+        if idx is None:
+            return None
+        return {field: column.item(idx) for field, column in self._instrument_columns.items()}
+    
+    def get_instrument_full(self, symbol):
+        """
+        Get every instrument field (name, expiry, strike, ...) for symbol
+        
+        These are not cached, so this downloads the exchange's instrument
+        dump; keep it off the trading path.
         
-        return self.instrument_cache.get(symbol, None)
+        Returns: instrument dict or None
+        """
+        exchange = self._instrument_field(symbol, 'exchange')
+        if not exchange:
+            return None
+        
+        try:
+            for inst in self.kite.instruments(exchange):
+                if inst['tradingsymbol'] == symbol:
+                    return inst
+            return None
+        except Exception as e:
+            logger.error("Error fetching instrument %s: %s", symbol, e)
+            raise
+    
+    def _instrument_index(self, symbol):
+        """Row of symbol in the instrument columns, loading its exchange on first miss"""
+        idx = self._symbol_idx.get(symbol)
+        if idx is None:
+            exchange = _exchange_for(symbol)
+            if exchange not in self.instruments_loaded:
+                self.load_instruments(exchange)
+                idx = self._symbol_idx.get(symbol)
+        return idx
     
+    def _instrument_field(self, symbol, field):
+        """Single cached instrument field for symbol, or None if unknown"""
+        idx = self._instrument_index(symbol)
+        if idx is None:
+            return None
+        return self._instrument_columns[field].item(idx)
+    
+    @_retry()
     def get_historical_data(self, symbol, from_date, to_date, interval='3minute'):
         """
         Fetch historical OHLC data
@@ -157,9 +385,41 @@ class KiteClient:
             return data
             
         except Exception as e:
-            logger.error(f"Error fetching historical data: {e}")
+            logger.error("Error fetching historical data: %s", e)
             raise
     
+    def _full_symbols(self, symbols):
+        """
+        Map exchange-qualified symbols ('BFO:...') back to trading symbols
+        
+        Unknown symbols are logged and left out so one bad symbol doesn't
+        fail the whole basket.
+        """
+        full_symbols = {}
+        for symbol in symbols:
+            exchange = self._instrument_field(symbol, 'exchange')
+            if not exchange:
+                logger.warning("Instrument not found, skipping: %s", symbol)
+                continue
+            full_symbols[f"{exchange}:{symbol}"] = symbol
+        return full_symbols
+    
+    def _batched(self, method, symbols):
+        """
+        Call a multi-instrument endpoint (kite.ltp / kite.quote) in chunks
+        
+        Returns: dict {trading symbol: endpoint payload}, without unknown symbols
+        """
+        full_symbols = self._full_symbols(symbols)
+        names = list(full_symbols)
+        
+        result = {}
+        for i in range(0, len(names), MAX_INSTRUMENTS_PER_REQUEST):
+            data = method(names[i:i + MAX_INSTRUMENTS_PER_REQUEST])
+            for full_symbol, payload in data.items():
+                result[full_symbols[full_symbol]] = payload
+        return result
+    
     def get_ltp(self, symbol):
         """
         Get Last Traded Price
@@ -169,41 +429,70 @@ class KiteClient:
         
         Returns: float LTP
         """
+        price = self._cached_ltp(symbol)
+        if price is not None:
+            return price
+        ltps = self.get_ltps([symbol])
+        if symbol not in ltps:
+            raise ValueError(f"No LTP returned for {symbol}")
+        return ltps[symbol]
+    
+    @_retry()
+    def get_ltps(self, symbols):
+        """
+        Get Last Traded Price for several symbols
+        
+        One request per MAX_INSTRUMENTS_PER_REQUEST symbols.
+        
+        Args:
+            symbols: List of trading symbols
+        
+        Returns: dict {symbol: float LTP}; unknown symbols are skipped
+        """
         try:
-            # Get full symbol with exchange
-            inst_details = self.get_instrument_details(symbol)
-            if not inst_details:
-                raise ValueError(f"Instrument not found: {symbol}")
-            
-            exchange = inst_details['exchange']
-            full_symbol = f"{exchange}:{symbol}"
+            data = self._batched(self.kite.ltp, symbols)
+            ltps = {symbol: ltp['last_price'] for symbol, ltp in data.items()}
             
-            ltp_data = self.kite.ltp(full_symbol)
-            return ltp_data[full_symbol]['last_price']
+            now = time.monotonic()
+            self._ltp_cache.update((symbol, (now, price)) for symbol, price in ltps.items())
+            return ltps
             
         except Exception as e:
-            logger.error(f"Error fetching LTP for {symbol}: {e}")
+            logger.error("Error fetching LTPs for %s symbols: %s", len(symbols), e)
             raise
     
+    def _cached_ltp(self, symbol):
+        """LTP fetched less than ltp_ttl seconds ago, or None"""
+        hit = self._ltp_cache.get(symbol)
+        if hit and time.monotonic() - hit[0] < self.ltp_ttl:
+            return hit[1]
+        return None
+    
     def get_quote(self, symbol):
         """
         Get full quote (OHLC + LTP + volume)
         
         Returns: dict with detailed quote
         """
+        quotes = self.get_quotes([symbol])
+        if symbol not in quotes:
+            raise ValueError(f"No quote returned for {symbol}")
+        return quotes[symbol]
+    
+    @_retry()
+    def get_quotes(self, symbols):
+        """
+        Get full quotes for several symbols
+        
+        One request per MAX_INSTRUMENTS_PER_REQUEST symbols.
+        
+        Returns: dict {symbol: quote dict}; unknown symbols are skipped
+        """
         try:
-            inst_details = self.get_instrument_details(symbol)
-            if not inst_details:
-                raise ValueError(f"Instrument not found: {symbol}")
-            
-            exchange = inst_details['exchange']
-            full_symbol = f"{exchange}:{symbol}"
-            
-            quote_data = self.kite.quote(full_symbol)
-            return quote_data[full_symbol]
+            return self._batched(self.kite.quote, symbols)
             
         except Exception as e:
-            logger.error(f"Error fetching quote for {symbol}: {e}")
+            logger.error("Error fetching quotes for %s symbols: %s", len(symbols), e)
             raise
     
     def place_order(self, symbol, transaction_type, quantity, 
@@ -226,12 +515,10 @@ class KiteClient:
         """
         try:
             # Get exchange
-            inst_details = self.get_instrument_details(symbol)
-            if not inst_details:
+            exchange = self._instrument_field(symbol, 'exchange')
+            if not exchange:
                 raise ValueError(f"Instrument not found: {symbol}")
             
-            exchange = inst_details['exchange']
-            
             order_params = {
                 'exchange': exchange,
                 'tradingsymbol': symbol,
@@ -248,37 +535,55 @@ class KiteClient:
                 order_params['trigger_price'] = trigger_price
             
             order_id = self.kite.place_order(**order_params)
-            logger.info(f"Order placed: {order_id} - {transaction_type} {quantity} {symbol}")
+            self._invalidate_positions()
+            self._ltp_cache.clear()
+            logger.info("Order placed: %s - %s %s %s", order_id, transaction_type, quantity, symbol)
             
             return order_id
             
         except Exception as e:
-            logger.error(f"Error placing order: {e}")
+            logger.error("Error placing order: %s", e)
             raise
     
+    @_retry()
     def get_positions(self):
         """Get current positions"""
         try:
             return self.kite.positions()
         except Exception as e:
-            logger.error(f"Error fetching positions: {e}")
+            logger.error("Error fetching positions: %s", e)
             raise
     
+    def _get_positions_indexed(self):
+        """Net positions as {(tradingsymbol, product): position}, cached briefly"""
+        fetched_at, indexed = self._positions_cache
+        now = time.monotonic()
+        if indexed is None or now - fetched_at >= self.positions_ttl:
+            positions = self.get_positions()['net']
+            indexed = {(p['tradingsymbol'], p['product']): p for p in positions}
+            self._positions_cache = (now, indexed)
+        return indexed
+    
+    def _invalidate_positions(self):
+        self._positions_cache = (0.0, None)
+    
+    @_retry()
     def get_orders(self):
         """Get order history for the day"""
         try:
             return self.kite.orders()
         except Exception as e:
-            logger.error(f"Error fetching orders: {e}")
+            logger.error("Error fetching orders: %s", e)
             raise
     
     def cancel_order(self, order_id, variety='regular'):
         """Cancel pending order"""
         try:
             self.kite.cancel_order(variety=variety, order_id=order_id)
-            logger.info(f"Order cancelled: {order_id}")
+            self._invalidate_positions()
+            logger.info("Order cancelled: %s", order_id)
         except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
+            logger.error("Error cancelling order: %s", e)
             raise
     
     def exit_position(self, symbol, quantity, product='MIS'):
@@ -294,13 +599,7 @@ class KiteClient:
         """
         try:
             # Determine transaction type based on existing position
-            positions = self.get_positions()['net']
-            
-            position = None
-            for pos in positions:
-                if pos['tradingsymbol'] == symbol and pos['product'] == product:
-                    position = pos
-                    break
+            position = self._get_positions_indexed().get((symbol, product))
             
             if not position:
                 raise ValueError(f"No position found for {symbol}")
@@ -322,7 +621,7 @@ class KiteClient:
             )
             
         except Exception as e:
-            logger.error(f"Error exiting position: {e}")
+            logger.error("Error exiting position: %s", e)
             raise
     
     def validate_token(self):
@@ -3,15 +3,180 @@ Telegram Notifier Module
 Sends trading alerts and system notifications via Telegram
 """
 
+import functools
 import requests
+from requests.adapters import HTTPAdapter
 import logging
+import queue
+import threading
+import time
+from operator import itemgetter
 from datetime import datetime
 import pytz
 
 logger = logging.getLogger(__name__)
 
+IST = pytz.timezone('Asia/Kolkata')
+
+# (epoch second, formatted IST timestamp) of the last _ist_timestamp() call
+_ist_state = (None, None)
+
+
+def _ist_timestamp():
+    """'YYYY-mm-dd HH:MM:SS IST', formatted at most once per second"""
+    global _ist_state
+    second, stamp = _ist_state
+    current = int(time.time())
+    if second != current:
+        stamp = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S IST")
+        _ist_state = (current, stamp)
+    return stamp
+
+
+# Queued messages sent within this many seconds of each other are merged
+# into one Telegram message, up to the API's length limit
+COALESCE_WINDOW = 0.5
+MAX_MESSAGE_LENGTH = 4096
+MESSAGE_SEPARATOR = "\n---\n"
+
+# Pivot block of the entry message, filled in one % operation
+_PIVOT_LEVELS = itemgetter('PP', 'R1', 'R2', 'R3', 'S1')
+_PIVOT_LINES = "PP: %.2f\nR1: %.2f | R2: %.2f | R3: %.2f\nS1: %.2f"
+
+
+def _gated(flag):
+    """Skip a send_* method entirely (returning False) when its notification flag is off"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.enabled.get(flag, True):
+                return False
+            return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class TelegramNotifier:
+    # Message bodies are built once; send_* methods only fill the fields
+    _ENTRY_TEMPLATE = """
+🚀 <b>ENTRY SIGNAL</b>
+
+📅 Time: {ist_time}
+
+<b>📊 Instrument Details:</b>
+Symbol: <code>{symbol}</code>
+Strike: {strike} {option_type}
+Entry Price: ₹{entry_price:.2f}
+
+<b>🎯 Trade Setup:</b>
+Scenario: {scenario}
+Entry Type: {entry_type}
+Structure: {structure}
+
+<b>💰 Risk Management:</b>
+Stop Loss: ₹{stop_loss:.2f}
+Target: ₹{target:.2f}
+Lot Size: {lot_size}
+
+<b>📈 Pivot Levels:</b>
+{pivot_levels}
+
+<b>📋 Signal Details:</b>
+Candle: O:{candle_open:.2f} H:{candle_high:.2f} L:{candle_low:.2f} C:{candle_close:.2f}
+Size: {size_percent:.2f}% (Significant ✅)
+
+<b>🎯 Trade Objective:</b>
+Expected Risk: ₹{expected_risk:.2f}
+Expected Reward: ₹{expected_reward:.2f}
+
+📍 Trade ID: <code>{trade_id}</code>
+
+🔔 Monitoring position for exit conditions...
+        """
+    
+    _EXIT_TEMPLATE = """
+🚪 <b>EXIT SIGNAL - {outcome}</b> {pnl_emoji}
+
+📅 Time: {ist_time}
+
+<b>📊 Trade Summary:</b>
+Symbol: <code>{symbol}</code>
+Strike: {strike} {option_type}
+Scenario: {scenario}
+
+<b>💰 Entry & Exit:</b>
+Entry: ₹{entry_price:.2f} @ {entry_time}
+Exit: ₹{exit_price:.2f} @ {exit_time}
+Duration: {duration_mins} minutes ({candles_held} candles)
+
+<b>📈 P&L:</b>
+Points: {pnl_points:+.2f}
+Rupees: ₹{pnl_rupees:+.2f}
+Lot Size: {lot_size}
+
+<b>{reason_emoji} Exit Reason:</b>
+{exit_reason}
+
+<b>🎯 Trade Setup Recap:</b>
+Target: ₹{target:.2f}
+Stop Loss: ₹{stop_loss:.2f}
+First Candle: {first_candle}
+Re-entry: {re_entry}
+
+📍 Trade ID: <code>{trade_id}</code>
+
+{closing_line}
+        """
+    
+    _EXIT_REASON_EMOJI = {
+        'TARGET': '🎯',
+        'STOP_LOSS': '🛑',
+        '10_CANDLE_TIMEOUT': '⏰',
+        'EOD': '🌅'
+    }
+    
+    _SUMMARY_TEMPLATE = """
+📊 <b>DAILY TRADING SUMMARY</b> {overall_emoji}
+
+📅 Date: {date}
+🕐 Generated: {ist_time}
+
+<b>📈 Performance:</b>
+Total Trades: {total_trades}
+Wins: {wins} ✅ | Losses: {losses} ❌
+Win Rate: {win_rate:.2f}%
+
+<b>💰 P&L:</b>
+Gross P&L: ₹{gross_pnl:+.2f}
+Max Drawdown: ₹{max_drawdown:.2f}
+
+<b>📋 Breakdown by Scenario:</b>
+Scenario 1 (PP-S1 → R1): {scenario_1_trades} trades
+Scenario 2 (PP-R1 → R2): {scenario_2_trades} trades
+Scenario 3 (R2-R3 → R3): {scenario_3_trades} trades
+
+<b>⏰ Entry Types:</b>
+First Candle: {first_candle_entries}
+Intraday: {intraday_entries}
+
+<b>🚪 Exit Breakdown:</b>
+🎯 Targets Hit: {targets_hit}
+🛑 Stop Losses: {stop_losses}
+⏰ Timeouts: {timeouts}
+🌅 EOD Exits: {eod_exits}
+
+<b>📊 Trade Quality:</b>
+{quality}
+
+<b>💡 Notes:</b>
+- Review logs for detailed trade analysis
+- Database updated with all trade details
+- System will start fresh tomorrow
+
+🌙 <b>End of Trading Day</b>
+System shutting down. See you tomorrow! 🚀
+        """
+    
     def __init__(self, config):
         """
         Initialize Telegram notifier
@@ -21,16 +186,36 @@ class TelegramNotifier:
         """
         self.token = config.get('telegram_token')
         self.chat_id = config.get('telegram_chat_id')
-        self.ist_tz = pytz.timezone('Asia/Kolkata')
+        self.ist_tz = IST
         self.enabled = config.get('notifications', {})
         
         if not self.token or not self.chat_id:
             logger.warning("Telegram credentials not configured")
+        
+        # Trade alerts are handed to a background sender so the trading
+        # loop never waits on api.telegram.org
+        self._outbox = queue.Queue()
+        self._sender = None
+        self._sender_lock = threading.Lock()
+        
+        # Keep-alive session so each message skips the TCP/TLS handshake.
+        # Sessions aren't thread-safe and both the caller and the sender
+        # post, so every request goes through _session_lock
+        self._session = requests.Session()
+        self._session_lock = threading.Lock()
+        self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    
+    def _now_ist(self):
+        """Current IST timestamp as shown in every message"""
+        return _ist_timestamp()
     
     def send_message(self, message, parse_mode='HTML'):
         """
         Send message via Telegram
         
+        Queued alerts are delivered first so a synchronous message (e.g.
+        the daily summary) never overtakes entries/exits still in the outbox.
+        
         Args:
             message: Message text
             parse_mode: 'HTML' or 'Markdown'
@@ -38,6 +223,18 @@ class TelegramNotifier:
         Returns:
             True if successful
         """
+        self._flush_outbox()
+        return self._post(message, parse_mode)
+    
+    def _flush_outbox(self):
+        """Block until the background sender has delivered everything queued"""
+        with self._sender_lock:
+            sender = self._sender
+        if sender is not None and sender.is_alive() and sender is not threading.current_thread():
+            self._outbox.join()
+    
+    def _post(self, message, parse_mode):
+        """Post one message to the Telegram API"""
         try:
             if not self.token or not self.chat_id:
                 logger.warning("Cannot send Telegram message: credentials not configured")
@@ -50,25 +247,110 @@ class TelegramNotifier:
                 "parse_mode": parse_mode
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            with self._session_lock:
+                response = self._session.post(url, data=data, timeout=10)
             
             if response.status_code == 200:
                 logger.info("Telegram message sent successfully")
                 return True
             else:
-                logger.error(f"Telegram API error: {response.status_code} - {response.text}")
+                logger.error("Telegram API error: %s - %s", response.status_code, response.text)
                 return False
                 
         except Exception as e:
-            logger.error(f"Failed to send Telegram message: {e}")
+            logger.error("Failed to send Telegram message: %s", e)
             return False
     
-    def send_authentication_request(self, login_url):
-        """Send authentication request with login link"""
-        if not self.enabled.get('send_auth_requests', True):
+    def send_message_async(self, message, parse_mode='HTML'):
+        """
+        Queue message for the background sender and return immediately
+        
+        Returns:
+            True if queued
+        """
+        if not self.token or not self.chat_id:
+            logger.warning("Cannot send Telegram message: credentials not configured")
             return False
         
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        with self._sender_lock:
+            if self._sender is None or not self._sender.is_alive():
+                self._sender = threading.Thread(
+                    target=self._sender_loop, name='telegram-sender', daemon=True
+                )
+                self._sender.start()
+        
+        self._outbox.put((message, parse_mode))
+        return True
+    
+    def _sender_loop(self):
+        """
+        Deliver queued messages in order until close() sends the sentinel
+        
+        Messages arriving within COALESCE_WINDOW of the first one in a
+        burst (e.g. several exits on one candle close) go out together.
+        """
+        outbox = self._outbox
+        while True:
+            item = outbox.get()
+            if item is None:
+                outbox.task_done()
+                return
+            
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + COALESCE_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = outbox.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            try:
+                self._send_batch(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    outbox.task_done()
+            if stop:
+                return
+    
+    def _send_batch(self, batch):
+        """Send (message, parse_mode) pairs as few messages as Telegram allows"""
+        parts, mode, size = [], None, 0
+        for message, parse_mode in batch:
+            added = len(message) + (len(MESSAGE_SEPARATOR) if parts else 0)
+            if parts and (parse_mode != mode or size + added > MAX_MESSAGE_LENGTH):
+                self._post(MESSAGE_SEPARATOR.join(parts), mode)
+                parts, size, added = [], 0, len(message)
+            parts.append(message)
+            mode = parse_mode
+            size += added
+        if parts:
+            self._post(MESSAGE_SEPARATOR.join(parts), mode)
+    
+    def close(self, timeout=30):
+        """Deliver any queued messages, stop the background sender and close the session"""
+        with self._sender_lock:
+            sender = self._sender
+            self._sender = None
+        
+        if sender is not None and sender.is_alive():
+            self._outbox.put(None)
+            sender.join(timeout)
+        
+        with self._session_lock:
+            self._session.close()
+    
+    @_gated('send_auth_requests')
+    def send_authentication_request(self, login_url):
+        """Send authentication request with login link"""
+        ist_time = self._now_ist()
         
         message = f"""
 🔐 <b>DAILY AUTHENTICATION REQUIRED</b>
@@ -95,12 +377,10 @@ class TelegramNotifier:
         
         return self.send_message(message)
     
+    @_gated('send_auth_requests')
     def send_authentication_success(self, user_name, token_preview):
         """Send authentication success notification"""
-        if not self.enabled.get('send_auth_requests', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        ist_time = self._now_ist()
         
         message = f"""
 ✅ <b>AUTHENTICATION SUCCESSFUL!</b>
@@ -128,12 +408,10 @@ You will receive alerts for:
         
         return self.send_message(message)
     
+    @_gated('send_auth_requests')
     def send_authentication_failure(self, error_reason):
         """Send authentication failure notification"""
-        if not self.enabled.get('send_auth_requests', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        ist_time = self._now_ist()
         
         message = f"""
 ❌ <b>AUTHENTICATION FAILED</b>
@@ -161,173 +439,95 @@ Check system logs: <code>tail -f logs/system.log</code>
         
         return self.send_message(message)
     
+    @_gated('send_entry_signals')
     def send_entry_signal(self, signal, position):
         """Send entry signal notification"""
-        if not self.enabled.get('send_entry_signals', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
-        
-        entry_type = "First Candle (9:15-9:18 AM)" if signal.is_first_candle else "Intraday"
-        
-        message = f"""
-🚀 <b>ENTRY SIGNAL</b>
-
-📅 Time: {ist_time}
-
-<b>📊 Instrument Details:</b>
-Symbol: <code>{signal.symbol}</code>
-Strike: {signal.strike} {signal.option_type}
-Entry Price: ₹{signal.entry_price:.2f}
-
-<b>🎯 Trade Setup:</b>
-Scenario: {signal.scenario}
-Entry Type: {entry_type}
-Structure: {signal.structure}
-
-<b>💰 Risk Management:</b>
-Stop Loss: ₹{signal.stop_loss:.2f}
-Target: ₹{signal.target:.2f}
-Lot Size: {position.lot_size}
-
-<b>📈 Pivot Levels:</b>
-PP: {signal.pivots['PP']:.2f}
-R1: {signal.pivots['R1']:.2f} | R2: {signal.pivots['R2']:.2f} | R3: {signal.pivots['R3']:.2f}
-S1: {signal.pivots['S1']:.2f}
-
-<b>📋 Signal Details:</b>
-Candle: O:{signal.candle_data['open']:.2f} H:{signal.candle_data['high']:.2f} L:{signal.candle_data['low']:.2f} C:{signal.candle_data['close']:.2f}
-Size: {signal.candle_data['size_percent']:.2f}% (Significant ✅)
-
-<b>🎯 Trade Objective:</b>
-Expected Risk: ₹{abs(signal.entry_price - signal.stop_loss) * position.lot_size:.2f}
-Expected Reward: ₹{abs(signal.target - signal.entry_price) * position.lot_size:.2f}
-
-📍 Trade ID: <code>{position.trade_id}</code>
-
-🔔 Monitoring position for exit conditions...
-        """
-        
-        return self.send_message(message)
+        message = self._ENTRY_TEMPLATE.format_map({
+            'ist_time': self._now_ist(),
+            'symbol': signal.symbol,
+            'strike': signal.strike,
+            'option_type': signal.option_type,
+            'entry_price': signal.entry_price,
+            'scenario': signal.scenario,
+            'entry_type': "First Candle (9:15-9:18 AM)" if signal.is_first_candle else "Intraday",
+            'structure': signal.structure,
+            'stop_loss': signal.stop_loss,
+            'target': signal.target,
+            'lot_size': position.lot_size,
+            'pivot_levels': _PIVOT_LINES % _PIVOT_LEVELS(signal.pivots),
+            'candle_open': signal.candle_data['open'],
+            'candle_high': signal.candle_data['high'],
+            'candle_low': signal.candle_data['low'],
+            'candle_close': signal.candle_data['close'],
+            'size_percent': signal.candle_data['size_percent'],
+            'expected_risk': abs(signal.entry_price - signal.stop_loss) * position.lot_size,
+            'expected_reward': abs(signal.target - signal.entry_price) * position.lot_size,
+            'trade_id': position.trade_id,
+        })
+        
+        return self.send_message_async(message)
     
+    @_gated('send_exit_signals')
     def send_exit_signal(self, trade_result):
         """Send exit signal notification"""
-        if not self.enabled.get('send_exit_signals', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
-        
         # Duration calculation
         duration_mins = (trade_result.exit_time - trade_result.entry_time).total_seconds() / 60
-        
-        # Emoji based on P&L
-        pnl_emoji = "✅" if trade_result.pnl_points > 0 else "❌"
-        outcome = "PROFIT" if trade_result.pnl_points > 0 else "LOSS"
-        
-        # Exit reason emoji
-        reason_emoji = {
-            'TARGET': '🎯',
-            'STOP_LOSS': '🛑',
-            '10_CANDLE_TIMEOUT': '⏰',
-            'EOD': '🌅'
-        }.get(trade_result.exit_reason, '🚪')
-        
-        message = f"""
-🚪 <b>EXIT SIGNAL - {outcome}</b> {pnl_emoji}
-
-📅 Time: {ist_time}
-
-<b>📊 Trade Summary:</b>
-Symbol: <code>{trade_result.symbol}</code>
-Strike: {trade_result.strike} {trade_result.option_type}
-Scenario: {trade_result.scenario}
-
-<b>💰 Entry & Exit:</b>
-Entry: ₹{trade_result.entry_price:.2f} @ {trade_result.entry_time.strftime('%H:%M:%S')}
-Exit: ₹{trade_result.exit_price:.2f} @ {trade_result.exit_time.strftime('%H:%M:%S')}
-Duration: {int(duration_mins)} minutes ({trade_result.candles_held} candles)
-
-<b>📈 P&L:</b>
-Points: {trade_result.pnl_points:+.2f}
-Rupees: ₹{trade_result.pnl_rupees:+.2f}
-Lot Size: {trade_result.lot_size}
-
-<b>{reason_emoji} Exit Reason:</b>
-{trade_result.exit_reason.replace('_', ' ').title()}
-
-<b>🎯 Trade Setup Recap:</b>
-Target: ₹{trade_result.target:.2f}
-Stop Loss: ₹{trade_result.stop_loss:.2f}
-First Candle: {'Yes' if trade_result.is_first_candle else 'No'}
-Re-entry: {'Yes' if trade_result.re_entry else 'No'}
-
-📍 Trade ID: <code>{trade_result.trade_id}</code>
-
-{'🎉 Congratulations on profitable trade!' if trade_result.pnl_points > 0 else '📊 Trade completed. Analyzing next opportunity...'}
-        """
-        
-        return self.send_message(message)
+        profitable = trade_result.pnl_points > 0
+        
+        message = self._EXIT_TEMPLATE.format_map({
+            'ist_time': self._now_ist(),
+            'outcome': "PROFIT" if profitable else "LOSS",
+            'pnl_emoji': "✅" if profitable else "❌",
+            'symbol': trade_result.symbol,
+            'strike': trade_result.strike,
+            'option_type': trade_result.option_type,
+            'scenario': trade_result.scenario,
+            'entry_price': trade_result.entry_price,
+            'entry_time': trade_result.entry_time.strftime('%H:%M:%S'),
+            'exit_price': trade_result.exit_price,
+            'exit_time': trade_result.exit_time.strftime('%H:%M:%S'),
+            'duration_mins': int(duration_mins),
+            'candles_held': trade_result.candles_held,
+            'pnl_points': trade_result.pnl_points,
+            'pnl_rupees': trade_result.pnl_rupees,
+            'lot_size': trade_result.lot_size,
+            'reason_emoji': self._EXIT_REASON_EMOJI.get(trade_result.exit_reason, '🚪'),
+            'exit_reason': trade_result.exit_reason.replace('_', ' ').title(),
+            'target': trade_result.target,
+            'stop_loss': trade_result.stop_loss,
+            'first_candle': 'Yes' if trade_result.is_first_candle else 'No',
+            're_entry': 'Yes' if trade_result.re_entry else 'No',
+            'trade_id': trade_result.trade_id,
+            'closing_line': '🎉 Congratulations on profitable trade!' if profitable else '📊 Trade completed. Analyzing next opportunity...',
+        })
+        
+        return self.send_message_async(message)
     
+    @_gated('send_daily_summary')
     def send_daily_summary(self, summary):
         """Send end-of-day summary"""
-        if not self.enabled.get('send_daily_summary', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        win_rate = summary['win_rate']
+        if win_rate >= 70:
+            quality = '🎉 Excellent day! Keep the momentum!'
+        elif win_rate >= 50:
+            quality = '👍 Good performance!'
+        else:
+            quality = '📈 Room for improvement. Analyze and adapt.'
         
         # Overall emoji
-        overall_emoji = "✅" if summary['gross_pnl'] > 0 else "❌" if summary['gross_pnl'] < 0 else "➖"
+        gross_pnl = summary['gross_pnl']
+        overall_emoji = "✅" if gross_pnl > 0 else "❌" if gross_pnl < 0 else "➖"
         
-        message = f"""
-📊 <b>DAILY TRADING SUMMARY</b> {overall_emoji}
-
-📅 Date: {summary['date']}
-🕐 Generated: {ist_time}
-
-<b>📈 Performance:</b>
-Total Trades: {summary['total_trades']}
-Wins: {summary['wins']} ✅ | Losses: {summary['losses']} ❌
-Win Rate: {summary['win_rate']:.2f}%
-
-<b>💰 P&L:</b>
-Gross P&L: ₹{summary['gross_pnl']:+.2f}
-Max Drawdown: ₹{summary['max_drawdown']:.2f}
-
-<b>📋 Breakdown by Scenario:</b>
-Scenario 1 (PP-S1 → R1): {summary['scenario_1_trades']} trades
-Scenario 2 (PP-R1 → R2): {summary['scenario_2_trades']} trades
-Scenario 3 (R2-R3 → R3): {summary['scenario_3_trades']} trades
-
-<b>⏰ Entry Types:</b>
-First Candle: {summary['first_candle_entries']}
-Intraday: {summary['intraday_entries']}
-
-<b>🚪 Exit Breakdown:</b>
-🎯 Targets Hit: {summary['targets_hit']}
-🛑 Stop Losses: {summary['stop_losses']}
-⏰ Timeouts: {summary['timeouts']}
-🌅 EOD Exits: {summary['eod_exits']}
-
-<b>📊 Trade Quality:</b>
-{'🎉 Excellent day! Keep the momentum!' if summary['win_rate'] >= 70 else '👍 Good performance!' if summary['win_rate'] >= 50 else '📈 Room for improvement. Analyze and adapt.'}
-
-<b>💡 Notes:</b>
-- Review logs for detailed trade analysis
-- Database updated with all trade details
-- System will start fresh tomorrow
-
-🌙 <b>End of Trading Day</b>
-System shutting down. See you tomorrow! 🚀
-        """
+        message = self._SUMMARY_TEMPLATE.format_map(
+            dict(summary, ist_time=self._now_ist(), overall_emoji=overall_emoji, quality=quality)
+        )
         
         return self.send_message(message)
     
+    @_gated('send_errors')
     def send_error_alert(self, error_type, error_message, context=None):
         """Send error alert notification"""
-        if not self.enabled.get('send_errors', True):
-            return False
-        
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        ist_time = self._now_ist()
         
         # Fix for f-string with backslash issue
         context_text = ""
@@ -358,9 +558,10 @@ Please investigate immediately.
         
         return self.send_message(message)
     
+    @_gated('send_system_events')
     def send_system_startup(self):
         """Send system startup notification"""
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        ist_time = self._now_ist()
         
         message = f"""
 🚀 <b>TRADING SYSTEM STARTED</b>
@@ -389,9 +590,10 @@ Please investigate immediately.
         
         return self.send_message(message)
     
+    @_gated('send_system_events')
     def send_system_shutdown(self, reason="Normal EOD shutdown"):
         """Send system shutdown notification"""
-        ist_time = datetime.now(self.ist_tz).strftime("%Y-%m-%d %H:%M:%S IST")
+        ist_time = self._now_ist()
         
         message = f"""
 🌙 <b>TRADING SYSTEM SHUTDOWN</b>
@@ -3,43 +3,129 @@ Pivot Point Calculator Module
 Calculates standard pivot points and determines market structure
 """
 
+from bisect import bisect_left
+from functools import lru_cache
+from operator import itemgetter
+
+import numpy as np
+
+PIVOT_LEVELS = ('PP', 'R1', 'R2', 'R3', 'R4', 'R5', 'S1', 'S2', 'S3')
+
+
+def _pivot_levels(high, low, close):
+    """
+    Unrounded pivot levels in PIVOT_LEVELS order
+    
+    Plain arithmetic, so it works on floats and NumPy arrays alike.
+    """
+    pp = (high + low + close) / 3
+    
+    # Resistance levels
+    r1 = 2 * pp - low
+    r2 = pp + (high - low)
+    r3 = high + 2 * (pp - low)
+    r4 = r3 + (r2 - r1)
+    r5 = r4 + (r3 - r2)
+    
+    # Support levels
+    s1 = 2 * pp - high
+    s2 = pp - (high - low)
+    s3 = low - 2 * (high - pp)
+    
+    return pp, r1, r2, r3, r4, r5, s1, s2, s3
+
+
+# Prior-session OHLC is fixed for the day, so the same (high, low, close)
+# comes back for every candle of a strike; these are pure and memoized.
+@lru_cache(maxsize=256)
+def _rounded_pivots(high, low, close):
+    """Pivot dict for one session (shared; callers get a copy)"""
+    levels = _pivot_levels(high, low, close)
+    return {name: round(level, 2) for name, level in zip(PIVOT_LEVELS, levels)}
+
+
+# Structure by sign of (R1 - PP) - (PP - S1) once |difference| >= 5:
+# index 0 / 1 / 2 for difference <= -5 / within 5 / >= 5
+STRUCTURE_THRESHOLD = 5
+STRUCTURES = ('BEARISH', 'NEUTRAL', 'BULLISH')
+_STRUCTURE_NAMES = np.array(STRUCTURES, dtype=object)
+
+
+@lru_cache(maxsize=256)
+def _structure(r1, pp, s1):
+    """Market structure from R1, PP and S1"""
+    difference = (r1 - pp) - (pp - s1)
+    return STRUCTURES[(difference >= STRUCTURE_THRESHOLD) - (difference <= -STRUCTURE_THRESHOLD) + 1]
+
+
+@lru_cache(maxsize=64)
+def _strike_ladder(atm, strike_range, strike_interval):
+    """Strikes from (ATM - range) to (ATM + range), both inclusive"""
+    return tuple(range(atm - strike_range, atm + strike_range + 1, strike_interval))
+
+
+# Zone boundaries in ascending order and the zone above each of them:
+# _ZONES[i] is the zone for prices with i boundaries strictly below them.
+# (There is no PP_S1 zone: S1 <= PP always.)
+_ZONE_LEVELS = itemgetter('S3', 'S1', 'PP', 'R1', 'R2', 'R3', 'R4', 'R5')
+_ZONES = (
+    ('BELOW_S3', None),
+    ('S3_S1', 'S1'),
+    ('S1_PP', 'PP'),
+    ('PP_R1', 'R2'),  # Scenario 2 zone
+    ('R1_R2', 'R2'),
+    ('R2_R3', 'R3'),  # Scenario 3 zone
+    ('R3_R4', 'R4'),
+    ('R4_R5', 'R5'),
+    ('ABOVE_R5', None),
+)
+_ZONE_NAMES = np.array([name for name, _ in _ZONES], dtype=object)
+_ZONE_TARGETS = np.array([target for _, target in _ZONES], dtype=object)
+
+
 class PivotCalculator:
     def __init__(self, config):
         self.config = config
         self.instrument = config['trading']['instrument']
         self.strike_interval = config['trading']['strike_interval']
         self.strike_range = config['trading']['strike_range']
+        
+        # ITM offset from ATM by (expiry day?, option type): CE ITM is a
+        # lower strike, PE ITM a higher one; 2 strikes on expiry day, else 1
+        interval = self.strike_interval
+        self._itm_offset = {
+            (True, 'CE'): -2 * interval,
+            (True, 'PE'): 2 * interval,
+            (False, 'CE'): -interval,
+            (False, 'PE'): interval,
+        }
     
     def calculate_pivots(self, high, low, close):
         """
         Calculate standard pivot points
         Returns: dict with PP, R1-R5, S1-S3
         """
-        pp = (high + low + close) / 3
+        return dict(_rounded_pivots(high, low, close))
+    
+    def calculate_pivots_batch(self, highs, lows, closes):
+        """
+        Calculate pivot points for many sessions/instruments at once
         
-        # Resistance levels
-        r1 = 2 * pp - low
-        r2 = pp + (high - low)
-        r3 = high + 2 * (pp - low)
-        r4 = r3 + (r2 - r1)
-        r5 = r4 + (r3 - r2)
+        Args:
+            highs, lows, closes: Equal-length array-likes (e.g. DataFrame columns)
         
-        # Support levels
-        s1 = 2 * pp - high
-        s2 = pp - (high - low)
-        s3 = low - 2 * (high - pp)
+        Returns: dict with PP, R1-R5, S1-S3, each a float64 ndarray
         
-        return {
-            'PP': round(pp, 2),
-            'R1': round(r1, 2),
-            'R2': round(r2, 2),
-            'R3': round(r3, 2),
-            'R4': round(r4, 2),
-            'R5': round(r5, 2),
-            'S1': round(s1, 2),
-            'S2': round(s2, 2),
-            'S3': round(s3, 2)
-        }
+        Note: np.round rounds the scaled value half-to-even, so a level
+        landing exactly on a half paisa can differ by 0.01 from
+        calculate_pivots (e.g. 2.675 -> 2.68 here, 2.67 there).
+        """
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        closes = np.asarray(closes, dtype=np.float64)
+        
+        levels = _pivot_levels(highs, lows, closes)
+        return {name: np.round(level, 2) for name, level in zip(PIVOT_LEVELS, levels)}
     
     def determine_structure(self, pivots):
         """
@@ -50,17 +136,18 @@ class PivotCalculator:
         Bearish:  (PP - S1) > (R1 - PP)
         Neutral:  |(R1 - PP) - (PP - S1)| < 5
         """
-        r1_pp_diff = pivots['R1'] - pivots['PP']
-        pp_s1_diff = pivots['PP'] - pivots['S1']
-        
-        difference = abs(r1_pp_diff - pp_s1_diff)
+        return _structure(pivots['R1'], pivots['PP'], pivots['S1'])
+    
+    def determine_structure_batch(self, pivots):
+        """
+        Vectorized determine_structure over calculate_pivots_batch output
         
-        if difference < 5:
-            return 'NEUTRAL'
-        elif r1_pp_diff > pp_s1_diff:
-            return 'BULLISH'
-        else:
-            return 'BEARISH'
+        Returns: object ndarray of 'BULLISH' / 'BEARISH' / 'NEUTRAL'
+        """
+        difference = (pivots['R1'] - pivots['PP']) - (pivots['PP'] - pivots['S1'])
+        codes = (difference >= STRUCTURE_THRESHOLD).astype(np.intp)
+        codes -= difference <= -STRUCTURE_THRESHOLD
+        return _STRUCTURE_NAMES[codes + 1]
     
     def get_atm_strike(self, spot_price):
         """
@@ -78,15 +165,7 @@ class PivotCalculator:
         Returns: List of strike prices
         """
         atm = self.get_atm_strike(spot_price)
-        strikes = []
-        
-        # Generate strikes from (ATM - range) to (ATM + range)
-        current = atm - self.strike_range
-        while current <= atm + self.strike_range:
-            strikes.append(current)
-            current += self.strike_interval
-        
-        return strikes
+        return list(_strike_ladder(atm, self.strike_range, self.strike_interval))
     
     def get_itm_strike(self, atm_strike, option_type, day_to_expiry):
         """
@@ -105,62 +184,42 @@ class PivotCalculator:
             option_type: 'CE' or 'PE'
             day_to_expiry: Days remaining to expiry (0 = expiry day)
         """
-        if day_to_expiry == 0:
-            # Expiry day: ATM-2
-            itm_distance = 2 * self.strike_interval
-        else:
-            # Non-expiry days: ATM-1
-            itm_distance = self.strike_interval
-        
-        if option_type == 'CE':
-            # For CE, ITM means lower strike
-            return atm_strike - itm_distance
-        else:
-            # For PE, ITM means higher strike
-            return atm_strike + itm_distance
-    
-    def is_price_in_range(self, price, lower, upper):
-        """Helper to check if price is between two levels"""
-        return lower <= price <= upper
+        return atm_strike + self._itm_offset[(day_to_expiry == 0, option_type)]
     
     def get_price_zone(self, price, pivots):
         """
         Determine which zone the price is in
         Returns: tuple (zone_name, target_level)
         
-        Zones:
+        Zones (each includes its upper level; S3_S1 also includes S3):
         - Below S3: No trade
         - S3 to S1: Support zone
         - S1 to PP: Below pivot
         - PP to R1: Between PP-R1 (Scenario 2 zone)
-        - PP to S1: Between PP-S1 (Scenario 1 zone)
         - R1 to R2: Above R1
         - R2 to R3: Between R2-R3 (Scenario 3 zone)
         - R3 to R4: Above R3
         - R4 to R5: Above R4
         - Above R5: No trade
         """
-        if price < pivots['S3']:
-            return ('BELOW_S3', None)
-        elif self.is_price_in_range(price, pivots['S3'], pivots['S1']):
-            return ('S3_S1', 'S1')
-        elif self.is_price_in_range(price, pivots['S1'], pivots['PP']):
-            return ('S1_PP', 'PP')
-        elif self.is_price_in_range(price, pivots['PP'], pivots['S1']):
-            return ('PP_S1', 'R1')  # Scenario 1 zone
-        elif self.is_price_in_range(price, pivots['PP'], pivots['R1']):
-            return ('PP_R1', 'R2')  # Scenario 2 zone
-        elif self.is_price_in_range(price, pivots['R1'], pivots['R2']):
-            return ('R1_R2', 'R2')
-        elif self.is_price_in_range(price, pivots['R2'], pivots['R3']):
-            return ('R2_R3', 'R3')  # Scenario 3 zone
-        elif self.is_price_in_range(price, pivots['R3'], pivots['R4']):
-            return ('R3_R4', 'R4')
-        elif self.is_price_in_range(price, pivots['R4'], pivots['R5']):
-            return ('R4_R5', 'R5')
-        else:
-            return ('ABOVE_R5', None)
-
+        levels = _ZONE_LEVELS(pivots)
+        if price < levels[0]:
+            return _ZONES[0]
+        # Number of levels strictly below price; S3 itself opens S3_S1
+        return _ZONES[max(bisect_left(levels, price), 1)]
+    
+    def get_price_zones_batch(self, prices, pivots):
+        """
+        Vectorized get_price_zone over an array of prices (backtest replay)
+        
+        Returns: tuple (zone_names, target_levels), object ndarrays
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        levels = np.array(_ZONE_LEVELS(pivots), dtype=np.float64)
+        
+        idx = np.searchsorted(levels, prices, side='left')
+        idx[(idx == 0) & (prices >= levels[0])] = 1
+        return _ZONE_NAMES[idx], _ZONE_TARGETS[idx]
 
 if __name__ == "__main__":
     # Test the calculator
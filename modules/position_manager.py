@@ -5,9 +5,39 @@ Tracks open positions and manages exits
 
 from datetime import datetime
 from dataclasses import dataclass
+from operator import attrgetter, itemgetter
 
+import numpy as np
 
-@dataclass
+# Exit reasons, stored in the trade log by index
+EXIT_REASONS = ('TARGET', 'STOP_LOSS', '10_CANDLE_TIMEOUT', 'EOD', 'PANIC')
+_EXIT_REASON_CODES = {reason: code for code, reason in enumerate(EXIT_REASONS)}
+
+# One row per closed trade in backtest mode (timestamps in epoch seconds)
+TRADE_LOG_DTYPE = np.dtype([
+    ('trade_id', 'U16'),
+    ('strike', 'i4'),
+    ('option_type', 'U2'),
+    ('scenario', 'i1'),
+    ('exit_reason', 'i1'),
+    ('is_first_candle', '?'),
+    ('re_entry', '?'),
+    ('candles_held', 'i2'),
+    ('entry_ts', 'i8'),
+    ('exit_ts', 'i8'),
+    ('entry_price', 'f8'),
+    ('exit_price', 'f8'),
+    ('pnl_points', 'f8'),
+    ('pnl_rupees', 'f8'),
+])
+
+
+def _hms(timestamp):
+    """'HH:MM:SS' for a datetime (same as strftime('%H:%M:%S'), ~4x faster)"""
+    return timestamp.time().isoformat('seconds')
+
+
+@dataclass(slots=True)
 class Position:
     """Represents an open trading position"""
     trade_id: str
@@ -30,28 +60,26 @@ class Position:
     pivots: dict
     candles_held: int = 0
     
+    # to_dict() keys, read in one attrgetter call (entry_time is reformatted)
+    _DICT_KEYS = (
+        'trade_id', 'symbol', 'strike', 'option_type', 'entry_time',
+        'entry_price', 'entry_candle_low', 'scenario', 'structure',
+        'is_first_candle', 'target', 'stop_loss', 'lot_size',
+        'candles_held', 'pivots',
+    )
+    _DICT_VALUES = attrgetter(*_DICT_KEYS)
+    _DICT_TEMPLATE = dict.fromkeys(_DICT_KEYS)
+    
     def to_dict(self):
         """Convert position to dictionary"""
-        return {
-            'trade_id': self.trade_id,
-            'symbol': self.symbol,
-            'strike': self.strike,
-            'option_type': self.option_type,
-            'entry_time': self.entry_time.strftime('%H:%M:%S'),
-            'entry_price': self.entry_price,
-            'entry_candle_low': self.entry_candle_low,
-            'scenario': self.scenario,
-            'structure': self.structure,
-            'is_first_candle': self.is_first_candle,
-            'target': self.target,
-            'stop_loss': self.stop_loss,
-            'lot_size': self.lot_size,
-            'candles_held': self.candles_held,
-            'pivots': self.pivots
-        }
+        # Copying a presized template skips rebuilding the hash table
+        d = self._DICT_TEMPLATE.copy()
+        d.update(zip(self._DICT_KEYS, self._DICT_VALUES(self)))
+        d['entry_time'] = _hms(self.entry_time)
+        return d
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeResult:
     """Result of a closed trade"""
     trade_id: str
@@ -80,41 +108,56 @@ class TradeResult:
     
     pivots: dict
     
+    # (database column, attribute) pairs for to_dict(); times are reformatted
+    _DICT_COLUMNS = (
+        ('trade_id', 'trade_id'),
+        ('symbol', 'symbol'),
+        ('strike', 'strike'),
+        ('option_type', 'option_type'),
+        ('entry_time', 'entry_time'),
+        ('entry_price', 'entry_price'),
+        ('entry_candle_low', 'stop_loss'),
+        ('exit_time', 'exit_time'),
+        ('exit_price', 'exit_price'),
+        ('exit_reason', 'exit_reason'),
+        ('scenario', 'scenario'),
+        ('structure', 'structure'),
+        ('first_candle_entry', 'is_first_candle'),
+        ('re_entry', 're_entry'),
+        ('target_price', 'target'),
+        ('sl_price', 'stop_loss'),
+        ('candles_held', 'candles_held'),
+        ('lot_size', 'lot_size'),
+        ('pnl_points', 'pnl_points'),
+        ('pnl_rupees', 'pnl_rupees'),
+    )
+    _DICT_VALUES = attrgetter(*(attr for _, attr in _DICT_COLUMNS))
+    _PIVOT_COLUMNS = ('pivot_pp', 'pivot_r1', 'pivot_r2', 'pivot_r3', 'pivot_r4', 'pivot_r5', 'pivot_s1')
+    _PIVOT_VALUES = itemgetter('PP', 'R1', 'R2', 'R3', 'R4', 'R5', 'S1')
+    
+    # Every output key in order, so to_dict() builds the dict in one pass
+    _FLAT_KEYS = tuple(column for column, _ in _DICT_COLUMNS) + _PIVOT_COLUMNS
+    _DICT_TEMPLATE = dict.fromkeys(_FLAT_KEYS)
+    
     def to_dict(self):
         """Convert trade result to dictionary for database"""
-        return {
-            'trade_id': self.trade_id,
-            'symbol': self.symbol,
-            'strike': self.strike,
-            'option_type': self.option_type,
-            'entry_time': self.entry_time.strftime('%H:%M:%S'),
-            'entry_price': self.entry_price,
-            'entry_candle_low': self.stop_loss,
-            'exit_time': self.exit_time.strftime('%H:%M:%S'),
-            'exit_price': self.exit_price,
-            'exit_reason': self.exit_reason,
-            'scenario': self.scenario,
-            'structure': self.structure,
-            'first_candle_entry': self.is_first_candle,
-            're_entry': self.re_entry,
-            'target_price': self.target,
-            'sl_price': self.stop_loss,
-            'candles_held': self.candles_held,
-            'lot_size': self.lot_size,
-            'pnl_points': self.pnl_points,
-            'pnl_rupees': self.pnl_rupees,
-            'pivot_pp': self.pivots['PP'],
-            'pivot_r1': self.pivots['R1'],
-            'pivot_r2': self.pivots['R2'],
-            'pivot_r3': self.pivots['R3'],
-            'pivot_r4': self.pivots['R4'],
-            'pivot_r5': self.pivots['R5'],
-            'pivot_s1': self.pivots['S1']
-        }
+        # Copying a presized template skips rebuilding the hash table
+        d = self._DICT_TEMPLATE.copy()
+        d.update(zip(self._FLAT_KEYS, self._DICT_VALUES(self) + self._PIVOT_VALUES(self.pivots)))
+        d['entry_time'] = _hms(self.entry_time)
+        d['exit_time'] = _hms(self.exit_time)
+        return d
 
 
 class PositionManager:
-    def __init__(self, config):
+    def __init__(self, config, backtest=False, max_trades=1024):
+        """
+        Args:
+            config: Configuration dictionary
+            backtest: Also record every closed trade in a preallocated
+                      NumPy trade log (see trades()) for vectorized analysis
+            max_trades: Initial trade log capacity (doubles when full)
+        """
         self.config = config
         self.position = None
         self.stop_loss_count = 0
@@ -122,6 +165,11 @@ class PositionManager:
         self.lot_size = config['trading']['lot_size']
         self.trade_counter = 0
         self.today_date = datetime.now().strftime('%Y%m%d')
+        self._id_prefix = f"{self.today_date}_"
+        
+        # Backtest trade log; spans days, so reset_daily_state keeps it
+        self.trade_log = np.zeros(max_trades, dtype=TRADE_LOG_DTYPE) if backtest else None
+        self.trade_count = 0
     
     def has_position(self):
         """Check if position is currently open"""
@@ -134,7 +182,7 @@ class PositionManager:
     def generate_trade_id(self):
         """Generate unique trade ID: YYYYMMDD_NNN"""
         self.trade_counter += 1
-        return f"{self.today_date}_{self.trade_counter:03d}"
+        return self._id_prefix + format(self.trade_counter, '03d')
     
     def open_position(self, signal, is_re_entry=False):
         """
@@ -176,7 +224,7 @@ class PositionManager:
         if self.has_position():
             self.position.candles_held = candle_count
     
-    def close_position(self, exit_price, exit_reason, is_re_entry=False):
+    def close_position(self, exit_price, exit_reason, is_re_entry=False, exit_time=None):
         """
         Close current position and calculate P&L
         
@@ -184,6 +232,8 @@ class PositionManager:
             exit_price: Exit price
             exit_reason: 'TARGET', 'STOP_LOSS', '10_CANDLE_TIMEOUT', 'EOD'
             is_re_entry: If this position was a re-entry
+            exit_time: Exit timestamp, e.g. the exit candle's time in a
+                       backtest (default: now)
         
         Returns: TradeResult object
         """
@@ -191,7 +241,8 @@ class PositionManager:
             raise Exception("Cannot close position: No position exists")
         
         pos = self.position
-        exit_time = datetime.now()
+        if exit_time is None:
+            exit_time = datetime.now()
         
         # Calculate P&L
         pnl_points = exit_price - pos.entry_price
@@ -225,19 +276,57 @@ class PositionManager:
             pivots=pos.pivots
         )
         
+        if self.trade_log is not None:
+            self._record_trade(result)
+        
         # Clear position
         self.position = None
         
         return result
     
-    def get_position_status(self):
-        """Get current position status for monitoring"""
+    def _record_trade(self, result):
+        """Append a closed trade to the backtest trade log"""
+        if self.trade_count == len(self.trade_log):
+            self.trade_log = np.resize(self.trade_log, 2 * len(self.trade_log))
+        
+        self.trade_log[self.trade_count] = (
+            result.trade_id,
+            result.strike,
+            result.option_type,
+            result.scenario,
+            _EXIT_REASON_CODES.get(result.exit_reason, -1),
+            result.is_first_candle,
+            result.re_entry,
+            result.candles_held,
+            int(result.entry_time.timestamp()),
+            int(result.exit_time.timestamp()),
+            result.entry_price,
+            result.exit_price,
+            result.pnl_points,
+            result.pnl_rupees,
+        )
+        self.trade_count += 1
+    
+    def trades(self):
+        """Closed trades so far as a structured array view (backtest mode only)"""
+        if self.trade_log is None:
+            raise ValueError("Trade log is only kept in backtest mode")
+        return self.trade_log[:self.trade_count]
+    
+    def get_position_status(self, now=None):
+        """
+        Get current position status for monitoring
+        
+        Args:
+            now: Current time, if the caller already has it (default: now)
+        """
         if not self.has_position():
             return None
         
         pos = self.position
-        current_time = datetime.now()
-        duration_mins = (current_time - pos.entry_time).total_seconds() / 60
+        if now is None:
+            now = datetime.now()
+        duration_mins = (now - pos.entry_time).total_seconds() / 60
         
         return {
             'trade_id': pos.trade_id,
@@ -245,7 +334,7 @@ class PositionManager:
             'strike': pos.strike,
             'option_type': pos.option_type,
             'entry_price': pos.entry_price,
-            'entry_time': pos.entry_time.strftime('%H:%M:%S'),
+            'entry_time': _hms(pos.entry_time),
             'duration_mins': round(duration_mins, 1),
             'candles_held': pos.candles_held,
             'target': pos.target,
@@ -254,21 +343,63 @@ class PositionManager:
             'is_first_candle': pos.is_first_candle
         }
     
+    def summary(self):
+        """
+        Aggregate P&L over the backtest trade log, vectorized
+        
+        Wins and drawdown follow the daily summary in the database: a win is
+        pnl_points > 0, drawdown is measured from the running equity peak.
+        The Sharpe ratio is annualized from per-day P&L (None with fewer
+        than two trading days or no variance).
+        
+        Returns: dict of aggregates
+        """
+        trades = self.trades()
+        pnl = trades['pnl_rupees']
+        if not len(pnl):
+            return {'total_trades': 0, 'wins': 0, 'losses': 0, 'win_rate': 0,
+                    'gross_pnl': 0, 'max_drawdown': 0, 'sharpe': None}
+        
+        equity = np.cumsum(pnl)
+        drawdown = np.maximum.accumulate(equity) - equity
+        wins = int(np.count_nonzero(trades['pnl_points'] > 0))
+        
+        # Trades are logged in exit order, so exit days are already sorted
+        days = trades['exit_ts'] // 86400
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        daily_pnl = np.add.reduceat(pnl, starts)
+        sharpe = None
+        if len(daily_pnl) > 1:
+            std = daily_pnl.std(ddof=1)
+            if std > 0:
+                sharpe = round(float(daily_pnl.mean() / std * np.sqrt(252)), 2)
+        
+        return {
+            'total_trades': len(pnl),
+            'wins': wins,
+            'losses': len(pnl) - wins,
+            'win_rate': round(wins / len(pnl) * 100, 2),
+            'gross_pnl': round(float(equity[-1]), 2),
+            'max_drawdown': round(float(drawdown.max()), 2),
+            'sharpe': sharpe,
+        }
+    
     def reset_daily_state(self):
         """Reset state for new trading day"""
         self.position = None
         self.stop_loss_count = 0
         self.trade_counter = 0
         self.today_date = datetime.now().strftime('%Y%m%d')
+        self._id_prefix = f"{self.today_date}_"
     
-    def get_stats(self):
+    def get_stats(self, now=None):
         """Get daily trading stats"""
         return {
             'has_position': self.has_position(),
             'stop_loss_count': self.stop_loss_count,
             'can_re_enter': self.can_re_enter(),
             'trades_today': self.trade_counter,
-            'position': self.get_position_status() if self.has_position() else None
+            'position': self.get_position_status(now) if self.has_position() else None
         }
 
 
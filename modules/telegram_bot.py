@@ -3,25 +3,154 @@ Telegram Bot Command Handler
 Provides interactive control via Telegram commands
 """
 
+import asyncio
 import json
+import os
 import sqlite3
-import subprocess
+import threading
+import time
 import psutil
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, ContextTypes
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Per-connection PRAGMAs for the bot's read connection (journal_mode=WAL is
+# persistent and set by Database.init_database)
+DB_PRAGMAS = (
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-20000',  # ~20MB page cache
+)
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache (keyed by SQL text) reuses the prepared statement across commands
+_OPEN_POSITIONS_SQL = '''
+    SELECT COUNT(*) FROM trades
+    WHERE date = ? AND exit_time IS NULL
+'''
+
+# Open positions and today's stats in one pass over today's trades
+_STATUS_SQL = '''
+    SELECT
+        COUNT(*) - COUNT(exit_time) as open_positions,
+        COUNT(*) as trades,
+        SUM(CASE WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as wins,
+        SUM(pnl_rupees) as pnl
+    FROM trades
+    WHERE date = ?
+'''
+
+_TODAY_TRADES_SQL = '''
+    SELECT
+        trade_id, symbol, entry_time, exit_time,
+        entry_price, exit_price, pnl_rupees, exit_reason
+    FROM trades
+    WHERE date = ?
+    ORDER BY entry_time DESC
+'''
+
+# Today's and this month's aggregates in one pass over the month's trades;
+# the date range (not strftime(date)) lets SQLite use the date index.
+# Aggregates over no matching rows are NULL, as in separate queries.
+_SUMMARY_SQL = '''
+    SELECT
+        COUNT(CASE WHEN is_today THEN 1 END) as trades,
+        SUM(CASE WHEN NOT is_today THEN NULL WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as wins,
+        SUM(CASE WHEN NOT is_today THEN NULL WHEN pnl_rupees < 0 THEN 1 ELSE 0 END) as losses,
+        SUM(CASE WHEN is_today THEN pnl_rupees END) as total_pnl,
+        AVG(CASE WHEN is_today THEN pnl_rupees END) as avg_pnl,
+        MAX(CASE WHEN is_today THEN pnl_rupees END) as best_trade,
+        MIN(CASE WHEN is_today THEN pnl_rupees END) as worst_trade,
+        COUNT(*) as month_trades,
+        SUM(CASE WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as month_wins,
+        SUM(pnl_rupees) as month_pnl
+    FROM (
+        SELECT pnl_rupees, date = :today as is_today
+        FROM trades
+        WHERE date >= :month_start AND date < :next_month
+    )
+'''
+
+# Longest reply the bot sends in one message (Telegram allows 4096 UTF-16
+# units; the margin covers emoji, which count as two)
+MAX_MESSAGE_LENGTH = 4000
+
+# Seconds a service's running state is reused before probing again
+SERVICE_STATUS_TTL = 2.0
+
+# Seconds between background health samples read by /health
+HEALTH_POLL_INTERVAL = 5.0
+
+# systemd's unified (cgroup v2) hierarchy: one directory per running unit
+SYSTEMD_CGROUP_ROOT = '/sys/fs/cgroup/system.slice'
+
 
 class TradingBotCommands:
+    # Reply bodies, filled with format_map
+    _STATUS_TEMPLATE = """
+📊 *System Status*
+
+*Trading:* {trading_status}
+*Mode:* {panic_status}
+
+*Services:*
+Auth Server: {auth_status}
+Trading System: {trading_system_status}
+
+*Today ({today}):*
+Open Positions: {open_positions}
+Total Trades: {total_trades}
+Wins: {total_wins}
+P&L: ₹{total_pnl:.2f}
+
+*Last Updated:* {last_updated}
+"""
+    
+    _SUMMARY_TEMPLATE = """
+📊 *Trading Summary*
+
+*Today ({today}):*
+Trades: {today_trades}
+Wins: {today_wins} | Losses: {today_losses}
+Win Rate: {win_rate_today:.1f}%
+Total P&L: ₹{today_pnl:.2f}
+Avg P&L: ₹{today_avg:.2f}
+Best: ₹{today_best:.2f}
+Worst: ₹{today_worst:.2f}
+
+*This Month:*
+Total Trades: {month_trades}
+Wins: {month_wins}
+Win Rate: {win_rate_month:.1f}%
+Total P&L: ₹{month_pnl:.2f}
+"""
+    
     def __init__(self, config_path='config.json'):
         self.config = self.load_config(config_path)
         self.config_path = config_path
         self.db_path = self.config['data']['database_path']
+        self._config_text = None  # Rendered /config message, see config_view
         self.control_file = 'data/trading_control.json'
         self.load_control_state()
+        
+        # One long-lived connection for every command, opened on first use
+        self._db = None
+        self._db_lock = threading.Lock()
+        
+        # service name -> (monotonic time, running), and probes in flight
+        self._service_status = {}
+        self._service_probes = {}
+        
+        # Fixed until reboot, so read once
+        self._boot_time = datetime.fromtimestamp(psutil.boot_time())
+        
+        # (cpu %, memory, disk) refreshed by _health_poller; the first
+        # non-blocking cpu_percent() call starts the CPU measurement
+        psutil.cpu_percent(interval=None)
+        self._health_snapshot = None
+        self._health_task = None
     
     def load_config(self, path):
         with open(path, 'r') as f:
@@ -30,25 +159,60 @@ class TradingBotCommands:
     def save_config(self):
         with open(self.config_path, 'w') as f:
             json.dump(self.config, f, indent=2)
+        self._config_text = None  # Re-render /config on next view
     
     def load_control_state(self):
-        """Load trading control state"""
-        try:
-            with open(self.control_file, 'r') as f:
-                self.control = json.load(f)
-        except:
-            self.control = {
-                'trading_enabled': True,
-                'panic_mode': False,
-                'last_updated': None
-            }
-            self.save_control_state()
+        """Load trading control state (defaults if missing or unreadable)"""
+        if os.path.exists(self.control_file):
+            try:
+                with open(self.control_file, 'r') as f:
+                    self.control = json.load(f)
+                return
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Unreadable control file %s, resetting: %s", self.control_file, e)
+        
+        self.control = {
+            'trading_enabled': True,
+            'panic_mode': False,
+            'last_updated': None
+        }
+        self.save_control_state()
     
     def save_control_state(self):
         """Save trading control state"""
         self.control['last_updated'] = datetime.now().isoformat()
-        with open(self.control_file, 'w') as f:
+        # Write-then-rename: the trading loop re-reads this file every cycle
+        # and resets it to defaults if it can't parse it
+        tmp_path = f"{self.control_file}.tmp"
+        with open(tmp_path, 'w') as f:
             json.dump(self.control, f, indent=2)
+        os.replace(tmp_path, self.control_file)
+    
+    def _connect(self):
+        """Open the shared read connection with DB_PRAGMAS applied"""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=256,
+            isolation_level=None
+        )
+        for pragma in DB_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _query(self, sql, params=()):
+        """Run a query on the shared connection and return all rows"""
+        with self._db_lock:
+            if self._db is None:
+                self._db = self._connect()
+            return self._db.execute(sql, params).fetchall()
+    
+    def close(self):
+        """Close the shared database connection"""
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
     
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Start command - show help"""
@@ -92,54 +256,29 @@ Type /help anytime to see this message.
             trading_status = "✅ ENABLED" if self.control['trading_enabled'] else "⛔ DISABLED"
             panic_status = "🚨 PANIC MODE" if self.control['panic_mode'] else "✅ Normal"
             
-            # Check if services are running
-            auth_running = self.is_service_running('pivot-auth.service')
-            trading_running = self.is_service_running('pivot-trading.service')
-            
-            # Get open positions
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM trades 
-                WHERE date = ? AND exit_time IS NULL
-            """, (date.today(),))
-            open_positions = cursor.fetchone()[0]
-            
-            # Today's stats
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as trades,
-                    SUM(CASE WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as wins,
-                    SUM(pnl_rupees) as pnl
-                FROM trades
-                WHERE date = ?
-            """, (date.today(),))
-            stats = cursor.fetchone()
-            conn.close()
-            
-            # Handle None values safely
-            total_trades = stats[0] or 0
-            total_wins = stats[1] or 0
-            total_pnl = stats[2] if stats[2] is not None else 0.0
+            # Check if services are running (both probes at once)
+            auth_running, trading_running = await asyncio.gather(
+                self.is_service_running('pivot-auth.service'),
+                self.is_service_running('pivot-trading.service')
+            )
             
-            message = f"""
-📊 *System Status*
-
-*Trading:* {trading_status}
-*Mode:* {panic_status}
-
-*Services:*
-Auth Server: {'✅ Running' if auth_running else '❌ Stopped'}
-Trading System: {'✅ Running' if trading_running else '❌ Stopped'}
-
-*Today ({date.today()}):*
-Open Positions: {open_positions}
-Total Trades: {total_trades}
-Wins: {total_wins}
-P&L: ₹{total_pnl:.2f}
-
-*Last Updated:* {self.control['last_updated'] or 'Never'}
-"""
+            # Open positions and today's stats
+            rows = await asyncio.to_thread(self._query, _STATUS_SQL, (date.today(),))
+            open_positions, *stats = rows[0]
+            
+            message = self._STATUS_TEMPLATE.format_map({
+                'trading_status': trading_status,
+                'panic_status': panic_status,
+                'auth_status': '✅ Running' if auth_running else '❌ Stopped',
+                'trading_system_status': '✅ Running' if trading_running else '❌ Stopped',
+                'today': date.today(),
+                'open_positions': open_positions,
+                # Handle None values safely
+                'total_trades': stats[0] or 0,
+                'total_wins': stats[1] or 0,
+                'total_pnl': stats[2] if stats[2] is not None else 0.0,
+                'last_updated': self.control['last_updated'] or 'Never'
+            })
             
             # Add control buttons
             keyboard = [
@@ -160,27 +299,48 @@ P&L: ₹{total_pnl:.2f}
         except Exception as e:
             await update.message.reply_text(f"❌ Error: {str(e)}")
     
+    def _sample_health(self):
+        """(cpu %, memory, disk) now; CPU is averaged since the previous sample"""
+        return (
+            psutil.cpu_percent(interval=None),
+            psutil.virtual_memory(),
+            psutil.disk_usage('/')
+        )
+    
+    async def _health_poller(self):
+        """Refresh the health snapshot every HEALTH_POLL_INTERVAL seconds"""
+        while True:
+            self._health_snapshot = self._sample_health()
+            await asyncio.sleep(HEALTH_POLL_INTERVAL)
+    
+    async def _start_health_poller(self, app):
+        """post_init hook: start sampling server health in the background"""
+        self._health_task = asyncio.create_task(self._health_poller())
+    
+    async def _stop_health_poller(self, app):
+        """post_shutdown hook: stop the health sampler"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+    
     async def health(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Server health check"""
         try:
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Latest background sample (taken now if the poller hasn't run yet)
+            cpu_percent, memory, disk = self._health_snapshot or self._sample_health()
             
             # Memory usage
-            memory = psutil.virtual_memory()
             memory_percent = memory.percent
             memory_used_gb = memory.used / (1024**3)
             memory_total_gb = memory.total / (1024**3)
             
             # Disk usage
-            disk = psutil.disk_usage('/')
             disk_percent = disk.percent
             disk_used_gb = disk.used / (1024**3)
             disk_total_gb = disk.total / (1024**3)
             
             # Uptime
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
-            uptime = datetime.now() - boot_time
+            uptime = datetime.now() - self._boot_time
             
             status = "✅ Healthy"
             if cpu_percent > 80 or memory_percent > 90 or disk_percent > 90:
@@ -241,14 +401,8 @@ P&L: ₹{total_pnl:.2f}
             self.save_control_state()
             
             # Get open positions
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) FROM trades 
-                WHERE date = ? AND exit_time IS NULL
-            """, (date.today(),))
-            open_positions = cursor.fetchone()[0]
-            conn.close()
+            rows = await asyncio.to_thread(self._query, _OPEN_POSITIONS_SQL, (date.today(),))
+            open_positions = rows[0][0]
             
             message = f"""
 🚨 *PANIC MODE ACTIVATED*
@@ -269,41 +423,41 @@ To resume normal operation:
     async def trades_today(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show today's trades"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    trade_id, symbol, entry_time, exit_time,
-                    entry_price, exit_price, pnl_rupees, exit_reason
-                FROM trades
-                WHERE date = ?
-                ORDER BY entry_time DESC
-            """, (date.today(),))
-            
-            trades = cursor.fetchall()
-            conn.close()
+            trades = await asyncio.to_thread(self._query, _TODAY_TRADES_SQL, (date.today(),))
             
             if not trades:
                 await update.message.reply_text("No trades today.")
                 return
             
-            message = f"📈 *Today's Trades* ({len(trades)})\n\n"
+            # One block per trade; a busy day is split across messages
+            # at trade boundaries rather than cut off at the length limit
+            parts = [f"📈 *Today's Trades* ({len(trades)})\n\n"]
+            size = len(parts[0])
             
             for trade in trades:
                 trade_id, symbol, entry_time, exit_time, entry_price, exit_price, pnl, reason = trade
                 status = "🟢 OPEN" if exit_time is None else ("✅ WIN" if pnl > 0 else "❌ LOSS")
                 
-                message += f"*{trade_id}*\n"
-                message += f"{symbol}\n"
-                message += f"Entry: ₹{entry_price:.2f} @ {entry_time}\n"
+                lines = [
+                    f"*{trade_id}*\n",
+                    f"{symbol}\n",
+                    f"Entry: ₹{entry_price:.2f} @ {entry_time}\n"
+                ]
                 if exit_time:
-                    message += f"Exit: ₹{exit_price:.2f} @ {exit_time}\n"
-                    message += f"P&L: ₹{pnl:.2f} ({reason})\n"
+                    lines.append(f"Exit: ₹{exit_price:.2f} @ {exit_time}\n")
+                    lines.append(f"P&L: ₹{pnl:.2f} ({reason})\n")
                 else:
-                    message += f"Status: {status}\n"
-                message += "\n"
+                    lines.append(f"Status: {status}\n")
+                lines.append("\n")
+                block = ''.join(lines)
+                
+                if size + len(block) > MAX_MESSAGE_LENGTH:
+                    await update.message.reply_text(''.join(parts), parse_mode='Markdown')
+                    parts, size = [], 0
+                parts.append(block)
+                size += len(block)
             
-            await update.message.reply_text(message, parse_mode='Markdown')
+            await update.message.reply_text(''.join(parts), parse_mode='Markdown')
             
         except Exception as e:
             await update.message.reply_text(f"❌ Error: {str(e)}")
@@ -311,71 +465,35 @@ To resume normal operation:
     async def summary(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Daily and monthly summary"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Today's summary
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as trades,
-                    SUM(CASE WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as wins,
-                    SUM(CASE WHEN pnl_rupees < 0 THEN 1 ELSE 0 END) as losses,
-                    SUM(pnl_rupees) as total_pnl,
-                    AVG(pnl_rupees) as avg_pnl,
-                    MAX(pnl_rupees) as best_trade,
-                    MIN(pnl_rupees) as worst_trade
-                FROM trades
-                WHERE date = ?
-            """, (date.today(),))
-            today = cursor.fetchone()
-            
-            # This month
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as trades,
-                    SUM(CASE WHEN pnl_rupees > 0 THEN 1 ELSE 0 END) as wins,
-                    SUM(pnl_rupees) as total_pnl
-                FROM trades
-                WHERE strftime('%Y-%m', date) = strftime('%Y-%m', 'now')
-            """, ())
-            month = cursor.fetchone()
-            
-            conn.close()
+            # Today's and this month's summary
+            current_day = date.today()
+            month_start = current_day.replace(day=1)
+            rows = await asyncio.to_thread(self._query, _SUMMARY_SQL, {
+                'today': current_day,
+                'month_start': month_start,
+                'next_month': (month_start + timedelta(days=32)).replace(day=1)
+            })
+            today, month = rows[0][:7], rows[0][7:]
             
             win_rate_today = (today[1] / today[0] * 100) if today[0] and today[0] > 0 else 0
             win_rate_month = (month[1] / month[0] * 100) if month[0] and month[0] > 0 else 0
             
-            # Handle None values safely
-            today_trades = today[0] or 0
-            today_wins = today[1] or 0
-            today_losses = today[2] or 0
-            today_pnl = today[3] if today[3] is not None else 0.0
-            today_avg = today[4] if today[4] is not None else 0.0
-            today_best = today[5] if today[5] is not None else 0.0
-            today_worst = today[6] if today[6] is not None else 0.0
-            
-            month_trades = month[0] or 0
-            month_wins = month[1] or 0
-            month_pnl = month[2] if month[2] is not None else 0.0
-            
-            message = f"""
-📊 *Trading Summary*
-
-*Today ({date.today()}):*
-Trades: {today_trades}
-Wins: {today_wins} | Losses: {today_losses}
-Win Rate: {win_rate_today:.1f}%
-Total P&L: ₹{today_pnl:.2f}
-Avg P&L: ₹{today_avg:.2f}
-Best: ₹{today_best:.2f}
-Worst: ₹{today_worst:.2f}
-
-*This Month:*
-Total Trades: {month_trades}
-Wins: {month_wins}
-Win Rate: {win_rate_month:.1f}%
-Total P&L: ₹{month_pnl:.2f}
-"""
+            message = self._SUMMARY_TEMPLATE.format_map({
+                'today': date.today(),
+                # Handle None values safely
+                'today_trades': today[0] or 0,
+                'today_wins': today[1] or 0,
+                'today_losses': today[2] or 0,
+                'win_rate_today': win_rate_today,
+                'today_pnl': today[3] if today[3] is not None else 0.0,
+                'today_avg': today[4] if today[4] is not None else 0.0,
+                'today_best': today[5] if today[5] is not None else 0.0,
+                'today_worst': today[6] if today[6] is not None else 0.0,
+                'month_trades': month[0] or 0,
+                'month_wins': month[1] or 0,
+                'win_rate_month': win_rate_month,
+                'month_pnl': month[2] if month[2] is not None else 0.0
+            })
             await update.message.reply_text(message, parse_mode='Markdown')
             
         except Exception as e:
@@ -410,9 +528,16 @@ Total P&L: ₹{month_pnl:.2f}
     
     async def config_view(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """View current configuration"""
+        # Rendered once per config version (save_config clears it)
+        if self._config_text is None:
+            self._config_text = self._render_config()
+        await update.message.reply_text(self._config_text, parse_mode='Markdown')
+    
+    def _render_config(self):
+        """/config message for the current settings"""
         trading = self.config['trading']
         
-        message = f"""
+        return f"""
 ⚙️ *Current Configuration*
 
 *Trading Settings:*
@@ -434,7 +559,6 @@ To modify settings, use:
 /setlots <number>
 /setmaxre <number>
 """
-        await update.message.reply_text(message, parse_mode='Markdown')
     
     async def reminders(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show upcoming renewals"""
@@ -489,33 +613,99 @@ To setup custom reminders:
         elif query.data == 'trades':
             await self.trades_today(update, context)
     
-    def is_service_running(self, service_name):
-        """Check if systemd service is running"""
-        try:
-            # Method 1: Try systemctl
-            result = subprocess.run(
-                ['systemctl', 'is-active', service_name],
-                capture_output=True,
-                text=True
+    async def _run_command(self, *args):
+        """Run a command without blocking the event loop; returns (returncode, stdout)"""
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        stdout, _ = await proc.communicate()
+        return proc.returncode, stdout.decode()
+    
+    async def is_service_running(self, service_name):
+        """
+        Check if systemd service is running
+        
+        Results are reused for SERVICE_STATUS_TTL seconds, and concurrent
+        checks of the same service share one probe.
+        """
+        cached = self._service_status.get(service_name)
+        if cached is not None and time.monotonic() - cached[0] < SERVICE_STATUS_TTL:
+            return cached[1]
+        
+        probe = self._service_probes.get(service_name)
+        if probe is None:
+            probe = asyncio.ensure_future(self._probe_service(service_name))
+            self._service_probes[service_name] = probe
+            probe.add_done_callback(
+                lambda task: self._store_service_status(service_name, task)
             )
-            if result.stdout.strip() == 'active':
+        return await asyncio.shield(probe)
+    
+    def _store_service_status(self, service_name, probe):
+        """Cache a finished probe's result"""
+        del self._service_probes[service_name]
+        if not probe.cancelled():
+            self._service_status[service_name] = (time.monotonic(), probe.result())
+    
+    def _cgroup_running(self, service_name):
+        """
+        Whether the unit's cgroup holds any process, read straight from
+        cgroupfs (no fork); None where systemd doesn't use cgroup v2
+        """
+        if not os.path.isdir(SYSTEMD_CGROUP_ROOT):
+            return None
+        try:
+            with open(os.path.join(SYSTEMD_CGROUP_ROOT, service_name, 'cgroup.procs')) as f:
+                return bool(f.read().strip())
+        except FileNotFoundError:
+            return False  # systemd removes the cgroup when the unit stops
+        except OSError:
+            return None
+    
+    def _process_running(self, script):
+        """Whether another process's command line mentions script (pgrep -f, without the fork)"""
+        own_pid = os.getpid()
+        for proc in psutil.process_iter(['cmdline']):
+            cmdline = proc.info['cmdline']
+            if cmdline and proc.pid != own_pid and script in ' '.join(cmdline):
+                return True
+        return False
+    
+    async def _probe_service(self, service_name):
+        """Ask systemd (falling back to pgrep) whether service_name is running"""
+        try:
+            # Method 1: The unit's cgroup, else systemctl
+            running = self._cgroup_running(service_name)
+            if running is None:
+                _, stdout = await self._run_command('systemctl', 'is-active', service_name)
+                running = stdout.strip() == 'active'
+            if running:
                 return True
             
             # Method 2: Fallback - check process
             if 'auth' in service_name:
-                result = subprocess.run(['pgrep', '-f', 'auth_server.py'], capture_output=True)
+                script = 'auth_server.py'
             elif 'trading' in service_name:
-                result = subprocess.run(['pgrep', '-f', 'main.py'], capture_output=True)
+                script = 'main.py'
             else:
                 return False
             
-            return result.returncode == 0
+            return await asyncio.to_thread(self._process_running, script)
         except:
             return False
     
     def setup_bot(self):
         """Setup Telegram bot with all handlers"""
-        app = Application.builder().token(self.config['telegram_token']).build()
+        app = (
+            Application.builder()
+            .token(self.config['telegram_token'])
+            .post_init(self._start_health_poller)
+            .post_shutdown(self._stop_health_poller)
+            .concurrent_updates(True)  # A slow /health doesn't hold up other chats
+            .build()
+        )
         
         # Command handlers
         app.add_handler(CommandHandler("start", self.start))
@@ -550,7 +740,11 @@ def main():
     print("🤖 Telegram Bot Started!")
     print("Send /start to your bot to see available commands")
     
-    app.run_polling()
+    try:
+        # Only the update types the handlers consume
+        app.run_polling(allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY])
+    finally:
+        bot.close()
 
 
 if __name__ == '__main__':
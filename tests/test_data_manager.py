@@ -0,0 +1,66 @@
+"""
+DataManager candle cache tests
+"""
+
+from datetime import datetime, timedelta
+
+from modules.data_manager import DataManager
+
+
+class FakeKite:
+    """Serves a day of 3-minute candles ending at the current time"""
+    
+    def __init__(self, volume=True):
+        self.calls = 0
+        self.volume = volume
+    
+    def get_historical_data(self, symbol, from_date, to_date, interval):
+        self.calls += 1
+        end = datetime.now().replace(second=0, microsecond=0)
+        rows = [
+            {
+                'date': end - timedelta(minutes=3 * i),
+                'open': 100.0 + i, 'high': 101.0 + i, 'low': 99.0 + i,
+                'close': 100.5 + i, 'volume': 10
+            }
+            for i in range(30, -1, -1)
+            if end - timedelta(minutes=3 * i) >= from_date
+        ]
+        if not self.volume:
+            for row in rows:
+                del row['volume']
+        return rows
+
+
+def _config(tmp_path):
+    return {
+        'trading': {'instrument': 'SENSEX'},
+        'market': {'holidays': []},
+        'data': {'cache_dir': str(tmp_path / 'cache')}
+    }
+
+
+def test_short_disk_cache_is_refilled_after_restart(tmp_path):
+    symbol = 'SENSEX2510280100CE'
+    
+    # Only a single candle reaches the disk cache before the restart
+    manager = DataManager(FakeKite(), _config(tmp_path))
+    manager._add_to_cache(symbol, {
+        'open': 100.0, 'high': 101.0, 'low': 99.0, 'close': 100.5,
+        'volume': 10, 'timestamp': datetime.now() - timedelta(minutes=30)
+    })
+    manager.disk_cache.put(symbol, datetime.now().date(), manager.candle_cache[symbol])
+    
+    restarted = DataManager(FakeKite(), _config(tmp_path))
+    candles = restarted.get_recent_candles(symbol, 20)
+    
+    assert len(candles) == 20
+    assert len(restarted.get_recent_candles(symbol, 20)) == 20
+
+
+def test_historical_rows_without_volume(tmp_path):
+    manager = DataManager(FakeKite(volume=False), _config(tmp_path))
+    candles = manager.get_recent_candles('SENSEX2510280100CE', 20)
+    
+    assert len(candles) == 20
+    assert all(candle['volume'] == 0 for candle in candles)
@@ -0,0 +1,18 @@
+"""
+KiteClient batch quote tests
+"""
+
+from modules.kite_client import KiteClient
+
+
+def test_get_ltps_skips_unknown_symbols(monkeypatch):
+    client = KiteClient('key', 'secret', access_token='token')
+    exchanges = {'SENSEX2510280100CE': 'BFO'}
+    monkeypatch.setattr(client, '_instrument_field', lambda symbol, field: exchanges.get(symbol))
+    monkeypatch.setattr(
+        client.kite, 'ltp', lambda names: {name: {'last_price': 123.5} for name in names}
+    )
+    
+    ltps = client.get_ltps(['SENSEX2510280100CE', 'NOT_A_SYMBOL'])
+    
+    assert ltps == {'SENSEX2510280100CE': 123.5}
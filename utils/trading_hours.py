@@ -3,7 +3,7 @@ Trading Hours Utility
 Validates market hours, holidays, and trading windows
 """
 
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 
 
 class TradingHours:
@@ -19,10 +19,10 @@ class TradingHours:
             config['market']['eod_exit_time'], '%H:%M'
         ).time()
         
-        self.holidays = [
+        self.holidays = frozenset(
             datetime.strptime(h, '%Y-%m-%d').date()
             for h in config['market']['holidays']
-        ]
+        )
     
     def is_holiday(self, date=None):
         """Check if given date is a holiday"""
@@ -99,17 +99,14 @@ class TradingHours:
         if self.is_market_open(current_time):
             return 0
         
-        # Find next market open
-        next_open = datetime.combine(current_time.date(), self.market_start)
-        
-        # If past today's open, check next trading day
-        if current_time.time() > self.market_start:
-            next_day = current_time.date()
-            while True:
-                next_day = next_day.replace(day=next_day.day + 1)
-                if self.is_trading_day(next_day):
-                    next_open = datetime.combine(next_day, self.market_start)
-                    break
+        # Find next market open: today if it's a trading day and before
+        # the open, else the next trading day (at most a few days ahead)
+        next_day = current_time.date()
+        if current_time.time() > self.market_start or not self.is_trading_day(next_day):
+            next_day += timedelta(days=1)
+            while not self.is_trading_day(next_day):
+                next_day += timedelta(days=1)
+        next_open = datetime.combine(next_day, self.market_start)
         
         delta = next_open - current_time
         return int(delta.total_seconds() / 60)